@@ -7,9 +7,11 @@ This module provides a unified interface for invoking various LLM CLIs
 
 Main components:
 - UniversalCLIAgent: The main agent class for CLI invocation
+- CLIAgentPool: Fixed-size pool of pre-started agents for parallel fan-out
 - CLIProfile: Configuration dataclass for defining CLI behavior
 - AgentResult: Standardized result dataclass
 - InputMode: Enum for file/directory input modes
+- ResultCache: Optional client-side cache of successful results
 - GEMINI_PROFILE, CODEX_PROFILE: Predefined profiles
 
 Example usage (file mode):
@@ -45,11 +47,22 @@ Example usage (auto-detect mode):
     )
 """
 
-from .core import AgentResult, CLIProfile, InputMode, UniversalCLIAgent
+from .core import (
+    AgentResult,
+    CLIAgentPool,
+    CLIProfile,
+    InputMode,
+    ResultCache,
+    UniversalCLIAgent,
+)
 from .profiles import (
     CODEX_PROFILE,
     GEMINI_PROFILE,
+    CodexStreamParser,
     PROFILES,
+    call_gemini_sdk,
+    close_agents,
+    get_agent,
     get_profile,
     parse_codex_ndjson,
     parse_gemini_json,
@@ -58,17 +71,23 @@ from .profiles import (
 __all__ = [
     # Core classes
     "UniversalCLIAgent",
+    "CLIAgentPool",
     "CLIProfile",
     "AgentResult",
     "InputMode",
+    "ResultCache",
     # Predefined profiles
     "GEMINI_PROFILE",
     "CODEX_PROFILE",
     "PROFILES",
     # Utility functions
     "get_profile",
+    "get_agent",
+    "close_agents",
+    "call_gemini_sdk",
     "parse_gemini_json",
     "parse_codex_ndjson",
+    "CodexStreamParser",
 ]
 
 __version__ = "1.0.0"
@@ -8,34 +8,58 @@ This module provides the core abstractions for interacting with various LLM CLIs
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import hashlib
 import json
 import logging
 import os
+import queue
+import re
+import select
 import shutil
+import signal
+import stat
 import subprocess
 import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
-from functools import lru_cache
+from functools import cache, lru_cache
+from itertools import groupby
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
 
 # Library-style logging: use NullHandler so callers control logging config
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+# Keep CLI subprocesses from flashing a console window on Windows
+_CREATE_NO_WINDOW = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+
 
 # =============================================================================
 # CLI Discovery Utilities
 # =============================================================================
 
-def _add_path_if_exists(paths: List[str], p: Optional[str]) -> None:
-    """Add path to list if it exists and is not empty."""
-    if not p:
-        return
-    resolved = Path(p).expanduser()
-    if resolved.exists():
-        paths.append(str(resolved))
+def _add_candidate(candidates: List[str], p: Optional[str]) -> None:
+    """Add path to the candidate list if it is not empty (existence is checked later).
+    
+    Normalized with os.path so dedup and parent grouping see one spelling.
+    """
+    if p:
+        candidates.append(os.path.normpath(os.path.expanduser(p)))
+
+
+# Environment variables that influence candidate path discovery.
+# HOME/USERPROFILE feed expanduser("~"); PATH feeds shutil.which("node").
+_CANDIDATE_ENV_VARS = (
+    "PNPM_HOME", "NVM_SYMLINK", "NVM_HOME", "NPM_CONFIG_PREFIX",
+    "APPDATA", "LOCALAPPDATA", "HOME", "USERPROFILE", "PATH",
+)
 
 
 def build_candidate_paths() -> List[str]:
@@ -50,83 +74,269 @@ def build_candidate_paths() -> List[str]:
     - ~/.npm-global/bin, ~/.local/share/pnpm, ~/.yarn/bin (Unix)
     - Directory containing node executable (via shutil.which)
     
+    The result is memoized on the values of the relevant environment
+    variables, so the stat calls and the node lookup run once per process
+    unless the environment changes.
+    
     Returns:
         Deduplicated list of existing paths, in priority order.
     """
-    paths: List[str] = []
+    return list(_build_candidate_paths_cached(_candidate_env_key()))
+
+
+def _candidate_env_key() -> Tuple[Optional[str], ...]:
+    """Snapshot of the environment variables that drive path discovery."""
+    return tuple(os.environ.get(var) for var in _CANDIDATE_ENV_VARS)
+
+
+@lru_cache(maxsize=4)
+def _build_candidate_paths_cached(env_key: Tuple[Optional[str], ...]) -> Tuple[str, ...]:
+    """Compute candidate paths for one snapshot of _CANDIDATE_ENV_VARS."""
+    env = dict(zip(_CANDIDATE_ENV_VARS, env_key))
+    candidates: List[str] = []
     
     # Environment-driven locations (highest priority)
     for var in ("PNPM_HOME", "NVM_SYMLINK", "NVM_HOME"):
-        _add_path_if_exists(paths, os.environ.get(var))
+        _add_candidate(candidates, env[var])
     
     # NPM custom prefix
-    npm_prefix = os.environ.get("NPM_CONFIG_PREFIX")
+    npm_prefix = env["NPM_CONFIG_PREFIX"]
     if npm_prefix:
         if os.name == "nt":
-            _add_path_if_exists(paths, npm_prefix)
+            _add_candidate(candidates, npm_prefix)
         else:
-            _add_path_if_exists(paths, str(Path(npm_prefix) / "bin"))
+            _add_candidate(candidates, os.path.join(npm_prefix, "bin"))
     
     # Windows-specific paths
-    appdata = os.environ.get("APPDATA")
+    appdata = env["APPDATA"]
     if appdata:
-        _add_path_if_exists(paths, str(Path(appdata) / "npm"))
+        _add_candidate(candidates, os.path.join(appdata, "npm"))
     
-    localapp = os.environ.get("LOCALAPPDATA")
+    localapp = env["LOCALAPPDATA"]
     if localapp:
-        _add_path_if_exists(paths, str(Path(localapp) / "Yarn" / "bin"))
-        _add_path_if_exists(paths, str(Path(localapp) / "pnpm"))
+        _add_candidate(candidates, os.path.join(localapp, "Yarn", "bin"))
+        _add_candidate(candidates, os.path.join(localapp, "pnpm"))
     
     # Unix-specific paths
-    _add_path_if_exists(paths, str(Path.home() / ".npm-global" / "bin"))
-    _add_path_if_exists(paths, str(Path.home() / ".local" / "share" / "pnpm"))
-    _add_path_if_exists(paths, str(Path.home() / ".yarn" / "bin"))
-    _add_path_if_exists(paths, "/usr/local/bin")
+    home = os.path.expanduser("~")
+    _add_candidate(candidates, os.path.join(home, ".npm-global", "bin"))
+    _add_candidate(candidates, os.path.join(home, ".local", "share", "pnpm"))
+    _add_candidate(candidates, os.path.join(home, ".yarn", "bin"))
+    _add_candidate(candidates, "/usr/local/bin")
     
     # Node's directory (if node is found, CLIs installed via npm might be there)
-    node_path = shutil.which("node")
+    node_path = shutil.which("node", path=env["PATH"])
     if node_path:
-        _add_path_if_exists(paths, str(Path(node_path).parent))
+        _add_candidate(candidates, os.path.dirname(node_path))
     
     # Deduplicate while preserving order
-    seen: set[str] = set()
-    unique: List[str] = []
-    for p in paths:
-        if p not in seen:
-            unique.append(p)
-            seen.add(p)
+    return tuple(_filter_existing(list(dict.fromkeys(candidates))))
+
+
+def _filter_existing(candidates: List[str]) -> List[str]:
+    """Return the candidates that exist, preserving order.
+    
+    Candidates are grouped by parent so siblings cost one os.scandir()
+    instead of one stat each, and the parents are listed concurrently: on
+    slow filesystems (network mounts, Windows Defender, WSL cross-fs) this
+    costs the slowest listing, not the sum. Parents are listed shallowest
+    first, so one nested under an already-listed directory is skipped when
+    that listing shows it missing (e.g. an unset-up LOCALAPPDATA on CI).
+    """
+    by_parent: Dict[str, List[str]] = {}
+    for p in candidates:
+        by_parent.setdefault(os.path.dirname(p), []).append(p)
     
-    return unique
+    # Complete listings of parents (normcase'd names); None marks a missing parent
+    listings: Dict[str, Optional[Set[str]]] = {}
+    
+    def known_missing(path: str) -> bool:
+        child, parent = path, os.path.dirname(path)
+        while parent != child:
+            if parent in listings:
+                names = listings[parent]
+                return names is None or os.path.normcase(os.path.basename(child)) not in names
+            child, parent = parent, os.path.dirname(parent)
+        return False
+    
+    def list_parent(parent: str) -> Tuple[Optional[Set[str]], bool]:
+        """Return (names, complete) for one parent."""
+        if known_missing(parent):
+            return None, True
+        try:
+            with os.scandir(parent) as it:
+                return {os.path.normcase(entry.name) for entry in it}, True
+        except (FileNotFoundError, NotADirectoryError):
+            return None, True
+        except OSError:
+            # Parent not listable (e.g. permissions): stat the children directly
+            names = {
+                os.path.normcase(os.path.basename(p))
+                for p in by_parent[parent] if os.path.exists(p)
+            }
+            return names, False
+    
+    found: Set[str] = set()
+    parents = sorted(by_parent, key=lambda d: d.count(os.sep))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for _, group in groupby(parents, key=lambda d: d.count(os.sep)):
+            wave = list(group)
+            for parent, (names, complete) in zip(wave, pool.map(list_parent, wave)):
+                if complete:
+                    listings[parent] = names
+                if names:
+                    found.update(
+                        p for p in by_parent[parent]
+                        if os.path.normcase(os.path.basename(p)) in names
+                    )
+    return [p for p in candidates if p in found]
+
+
+# Last extended PATH, tagged with the environment snapshot it was built from
+_EXTENDED_PATH_CACHE: Optional[Tuple[Tuple[Optional[str], ...], str]] = None
 
 
 def build_extended_path() -> str:
     """Build an extended PATH string with candidate directories prepended.
     
+    The joined string is cached and reused until one of the discovery
+    environment variables (including PATH) changes.
+    
     Returns:
         PATH string with candidate paths prepended to the current PATH.
     """
-    extra = build_candidate_paths()
+    global _EXTENDED_PATH_CACHE
+    env_key = _candidate_env_key()
+    cached = _EXTENDED_PATH_CACHE
+    if cached is not None and cached[0] == env_key:
+        return cached[1]
+    
+    extra = list(_build_candidate_paths_cached(env_key))
     current = os.environ.get("PATH", "")
-    return os.pathsep.join(extra + [current])
+    extended = os.pathsep.join(extra + [current])
+    _EXTENDED_PATH_CACHE = (env_key, extended)
+    return extended
+
+
+def reset_path_cache() -> None:
+    """Forget cached candidate paths and extended PATH (e.g. in tests)."""
+    global _EXTENDED_PATH_CACHE
+    _EXTENDED_PATH_CACHE = None
+    _build_candidate_paths_cached.cache_clear()
+
+
+# Process-lifetime cache of located CLI executables.
+# Keyed by (name, extended_path) so a changed PATH naturally misses the cache.
+_CLI_CACHE: Dict[Tuple[str, str], str] = {}
+
+# Successful --version checks, persisted across processes and keyed by
+# executable path: {exe: {"mtime_ns": int, "checked_at": float}}. An entry
+# only counts while the executable's mtime matches, so upgrades re-verify.
+_VERIFY_CACHE: Optional[Dict[str, Dict[str, Any]]] = None
+_VERIFY_CACHE_LOCK = threading.Lock()
+_VERIFY_CACHE_TTL = 24 * 3600       # Trust a successful check this long
+_VERIFY_REFRESH_AFTER = 3600        # Re-check in the background after this long
+_VERIFY_REFRESHING: set = set()     # Executables with a background check running
+
+
+def invalidate_cli_cache() -> None:
+    """Clear cached CLI resolutions (e.g. after installing a CLI or changing PATH).
+    
+    The --version verify cache is kept: its entries are keyed by executable
+    path and mtime, so a moved, replaced or upgraded CLI misses it anyway.
+    """
+    _CLI_CACHE.clear()
+    _path_dirs.cache_clear()
+
+
+@lru_cache(maxsize=8)
+def _path_dirs(extended_path: str) -> Tuple[str, ...]:
+    """Tokenize a PATH string once: non-empty entries, deduplicated, in order."""
+    return tuple(dict.fromkeys(d for d in extended_path.split(os.pathsep) if d))
+
+
+# Extensions always tried on Windows, in addition to PATHEXT
+_WINDOWS_CLI_EXTS = (".COM", ".EXE", ".BAT", ".CMD")
+
+
+@lru_cache(maxsize=4)
+def _windows_pathext(pathext_env: str) -> Tuple[str, ...]:
+    """Parse PATHEXT once, appending any of _WINDOWS_CLI_EXTS it lacks."""
+    pathext = [ext.upper() for ext in pathext_env.split(os.pathsep) if ext]
+    # npm shims are .cmd files; make sure they match even with a trimmed PATHEXT
+    pathext += [ext for ext in _WINDOWS_CLI_EXTS if ext not in pathext]
+    return tuple(pathext)
+
+
+def _is_executable_file(path: str) -> bool:
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def _fast_which(name: str, path_dirs: Tuple[str, ...], names: Tuple[str, ...]) -> Optional[str]:
+    """Probe each PATH directory for each candidate filename, in order.
+    
+    Not cached itself: _locate_cli() caches hits, so a CLI installed later
+    is still picked up.
+    """
+    for directory in path_dirs:
+        for candidate in names:
+            path = os.path.join(directory, candidate)
+            if _is_executable_file(path):
+                return path
+    return None
+
+
+def _which(name: str, extended_path: str) -> Optional[str]:
+    """shutil.which equivalent over a pre-tokenized PATH.
+    
+    Honors PATHEXT on Windows (plus .COM/.EXE/.BAT/.CMD if missing): the
+    first directory containing any name+ext match wins, with ties broken by
+    extension order, so a single lookup covers npm .cmd shims.
+    """
+    if os.path.dirname(name):
+        return shutil.which(name, path=extended_path)
+    
+    if os.name == "nt":
+        pathext = _windows_pathext(os.environ.get("PATHEXT", ""))
+        if os.path.splitext(name)[1].upper() in pathext:
+            names: Tuple[str, ...] = (name,)
+        else:
+            names = tuple(name + ext for ext in pathext)
+    else:
+        names = (name,)
+    
+    return _fast_which(name, _path_dirs(extended_path), names)
 
 
 def resolve_cli_executable(
     name: str,
     extended_path: Optional[str] = None,
-    verify_version: bool = True,
+    verify_version: bool = False,
     env: Optional[Dict[str, str]] = None,
 ) -> Optional[str]:
-    """Find CLI executable using shutil.which, then optionally verify with --version.
+    """Find CLI executable on PATH, then optionally verify with --version.
+    
+    Lookup probes the PATH directories with shutil.which semantics (see
+    _which()); a PATH string is tokenized once per process.
     
     This approach is more robust than running `name --version` first because:
-    1. shutil.which correctly handles .cmd/.bat on Windows
+    1. PATHEXT lookup correctly handles .cmd/.bat on Windows
     2. Avoids subprocess failures when CLI is not found
     3. Only runs --version on a known-existing executable
     
+    Successful lookups are cached for the process lifetime, keyed by
+    (name, extended_path), and successful --version checks are persisted
+    per (executable, mtime) for 24h, so repeated calls skip both the PATH
+    scan and the --version subprocess. Use invalidate_cli_cache() to force
+    re-resolution.
+    
     Args:
         name: Base name of the CLI (e.g., 'gemini', 'codex')
         extended_path: Custom PATH string to search in. If None, uses build_extended_path().
         verify_version: Whether to run --version to verify the CLI works.
+            Off by default: spawning a Node-based CLI just to print its version
+            costs hundreds of milliseconds on Windows, and callers can verify
+            lazily when the real invocation fails.
         env: Environment dict to pass to subprocess (for version check).
         
     Returns:
@@ -135,46 +345,378 @@ def resolve_cli_executable(
     if extended_path is None:
         extended_path = build_extended_path()
     
-    # Use shutil.which to find the executable
-    exe = shutil.which(name, path=extended_path)
-    logger.debug("shutil.which('%s') -> %s", name, exe)
+    exe = _locate_cli(name, extended_path)
+    if exe and verify_version and not _verify_cli(exe, extended_path, env):
+        return None
+    return exe
+
+
+def _locate_cli(name: str, extended_path: str) -> Optional[str]:
+    """Locate a CLI on the extended PATH, caching successful lookups."""
+    cache_key = (name, extended_path)
+    exe = _CLI_CACHE.get(cache_key)
+    if exe:
+        return exe
+    
+    # Probe the PATH directories
+    exe = _which(name, extended_path)
+    logger.debug("which('%s') -> %s", name, exe)
+    if exe:
+        _CLI_CACHE[cache_key] = exe
+    return exe
+
+
+def _verify_cache_path() -> Path:
+    """Location of the persisted --version cache (honors XDG_CACHE_HOME)."""
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "cli_subagent" / "cli_verify.json"
+
+
+def _load_verify_cache() -> Dict[str, Dict[str, Any]]:
+    """Return the in-memory verify cache, loading it from disk on first use."""
+    global _VERIFY_CACHE
+    with _VERIFY_CACHE_LOCK:
+        if _VERIFY_CACHE is None:
+            try:
+                data = json.loads(_verify_cache_path().read_text(encoding="utf-8"))
+                _VERIFY_CACHE = data if isinstance(data, dict) else {}
+            except (OSError, ValueError):
+                _VERIFY_CACHE = {}
+        return _VERIFY_CACHE
+
+
+def _save_verify_cache() -> None:
+    """Atomically write the verify cache to disk; failures are only logged."""
+    with _VERIFY_CACHE_LOCK:
+        snapshot = dict(_VERIFY_CACHE or {})
+    path = _verify_cache_path()
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(snapshot), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.debug("Could not save CLI verify cache to %s: %s", path, e)
+
+
+def _verify_cli(exe: str, extended_path: str, env: Optional[Dict[str, str]] = None) -> bool:
+    """Check that exe runs `--version` successfully.
+    
+    A successful check younger than 24h (for the same executable mtime) is
+    trusted without spawning anything; once it is older than 1h a refresh
+    runs on a daemon thread. Only cold misses run --version synchronously.
+    """
+    try:
+        mtime_ns = os.stat(exe).st_mtime_ns
+    except OSError as e:
+        logger.debug("CLI '%s' cannot be stat'ed: %s", exe, e)
+        return False
+    if not os.access(exe, os.X_OK):
+        logger.debug("CLI '%s' is not executable", exe)
+        return False
+    
+    entry = _load_verify_cache().get(exe)
+    if entry and entry.get("mtime_ns") == mtime_ns:
+        age = time.time() - entry.get("checked_at", 0)
+        if age < _VERIFY_CACHE_TTL:
+            if age > _VERIFY_REFRESH_AFTER:
+                with _VERIFY_CACHE_LOCK:
+                    start_refresh = exe not in _VERIFY_REFRESHING
+                    _VERIFY_REFRESHING.add(exe)
+                if start_refresh:
+                    threading.Thread(
+                        target=_run_version_check,
+                        args=(exe, mtime_ns, extended_path, env),
+                        daemon=True,
+                    ).start()
+            return True
+    
+    return _run_version_check(exe, mtime_ns, extended_path, env)
+
+
+def _run_version_check(
+    exe: str,
+    mtime_ns: int,
+    extended_path: str,
+    env: Optional[Dict[str, str]] = None,
+) -> bool:
+    """Run `exe --version` and record a success in the verify cache."""
+    try:
+        check_env = dict(env) if env else os.environ.copy()
+        check_env["PATH"] = extended_path
+        
+        # Output is not inspected, so capture bytes and skip decoding
+        result = subprocess.run(
+            [exe, "--version"],
+            capture_output=True,
+            timeout=10,
+            env=check_env,
+            creationflags=_CREATE_NO_WINDOW,
+        )
+        ok = result.returncode == 0
+        if not ok:
+            logger.debug("CLI '%s' --version failed with code %d", exe, result.returncode)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        logger.debug("CLI '%s' --version raised %s: %s", exe, type(e).__name__, e)
+        ok = False
+    
+    cache = _load_verify_cache()
+    with _VERIFY_CACHE_LOCK:
+        _VERIFY_REFRESHING.discard(exe)
+        if ok:
+            cache[exe] = {"mtime_ns": mtime_ns, "checked_at": time.time()}
+        else:
+            # Failures are never cached: a transient timeout must not stick
+            cache.pop(exe, None)
+    _save_verify_cache()
+    return ok
+
+
+def _decode_output(data: bytes) -> str:
+    """Decode raw CLI output once (UTF-8, universal newlines).
+    
+    Invalid bytes are replaced rather than failing the whole call, and the
+    newline passes are skipped for output without carriage returns.
+    """
+    text = data.decode("utf-8", "replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+# A template string with {agent_prompt_path} already substituted: either the
+# final literal, or the pieces around each {temp_dir} to be joined per call.
+_CompiledTemplate = Union[str, Tuple[str, ...]]
+
+
+# Every placeholder a template may contain (the task itself goes via stdin)
+_PLACEHOLDER_RE = re.compile(r"\{(agent_prompt_path|temp_dir)\}")
+
+
+@lru_cache(maxsize=256)
+def _split_template(template: str) -> Tuple[str, ...]:
+    """Parse a template once: literals at even indices, placeholder names at odd.
     
-    # On Windows, also try with .cmd extension if not found
-    if os.name == "nt" and not exe:
-        exe = shutil.which(f"{name}.cmd", path=extended_path)
+    Keyed by the template string, so every agent built from the same profile
+    reuses the parse; editing a profile's templates simply misses the cache.
+    """
+    return tuple(_PLACEHOLDER_RE.split(template))
+
+
+def _compile_template(template: str, prompt_path: str) -> _CompiledTemplate:
+    """Substitute the per-agent placeholder and pre-split on {temp_dir}.
     
-    if not exe:
+    Works from the cached parse, so a prompt path that itself contains
+    "{temp_dir}" is not expanded a second time.
+    """
+    tokens = _split_template(template)
+    pieces = [tokens[0]]
+    for i in range(1, len(tokens), 2):
+        if tokens[i] == "agent_prompt_path":
+            pieces[-1] += prompt_path + tokens[i + 1]
+        else:
+            pieces.append(tokens[i + 1])
+    return pieces[0] if len(pieces) == 1 else tuple(pieces)
+
+
+def _render_template(compiled: _CompiledTemplate, temp_dir: str) -> str:
+    """Produce the final string for one call from a compiled template."""
+    if isinstance(compiled, str):
+        return compiled
+    return temp_dir.join(compiled)
+
+
+def _absolute_path(path: Union[str, Path]) -> Path:
+    """Return path as absolute, only paying for resolve() when it is relative."""
+    p = Path(path)
+    return p if p.is_absolute() else _resolve_relative(os.getcwd(), str(p))
+
+
+@lru_cache(maxsize=64)
+def _resolve_relative(cwd: str, path: str) -> Path:
+    """resolve() a relative path once per (cwd, path).
+    
+    Agents sharing a prompt file skip the per-component symlink walk.
+    Existence is deliberately not cached; callers still stat the result.
+    """
+    return (Path(cwd) / path).resolve()
+
+
+def _stat_or_none(path: Union[str, Path]) -> Optional[os.stat_result]:
+    """Single stat syscall doubling as an existence check."""
+    try:
+        return os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
         return None
+
+
+def _remove_temp_dir(temp_dir: Union[str, Path], known_files: Tuple[str, ...] = ()) -> None:
+    """Delete a temp dir, trying unlink + rmdir before a full rmtree walk.
     
-    # Optionally verify the CLI works by running --version
-    if verify_version:
+    known_files are the names this library wrote there; when the CLI added
+    nothing else, removing them leaves an empty dir and rmtree is skipped.
+    """
+    for name in known_files:
         try:
-            check_env = env if env else os.environ.copy()
-            check_env["PATH"] = extended_path
-            
-            result = subprocess.run(
-                [exe, "--version"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                env=check_env,
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
+            os.unlink(os.path.join(temp_dir, name))
+        except OSError:
+            pass
+    try:
+        os.rmdir(temp_dir)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        # Not empty: the CLI wrote extra files
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+# Agents' persistent temp dirs currently on disk: {dir: files placed there}.
+# One atexit hook removes whatever agents never closed.
+_LIVE_TEMP_DIRS: Dict[Path, Tuple[str, ...]] = {}
+_LIVE_TEMP_DIRS_LOCK = threading.Lock()
+
+
+def _discard_temp_dir(temp_dir: Path, known_files: Tuple[str, ...] = ()) -> None:
+    """Remove a temp dir and forget it if it was a tracked persistent dir."""
+    with _LIVE_TEMP_DIRS_LOCK:
+        _LIVE_TEMP_DIRS.pop(temp_dir, None)
+    _remove_temp_dir(temp_dir, known_files)
+
+
+def _remove_live_temp_dirs() -> None:
+    with _LIVE_TEMP_DIRS_LOCK:
+        live = list(_LIVE_TEMP_DIRS.items())
+        _LIVE_TEMP_DIRS.clear()
+    for temp_dir, known_files in live:
+        _remove_temp_dir(temp_dir, known_files)
+
+
+atexit.register(_remove_live_temp_dirs)
+
+
+# Largest task written straight to the child's stdin pipe. A fresh pipe
+# accepts at least PIPE_BUF bytes (POSIX: atomically) without blocking;
+# Windows has no PIPE_BUF but its default pipe buffer is larger than 512.
+_STDIN_DIRECT_MAX = getattr(select, "PIPE_BUF", 512)
+
+# Smallest task handed to the child as a file-backed stdin rather than a pipe.
+# Above the default pipe capacity a writer thread would sit blocked for as
+# long as the CLI takes to read the task; a file needs no thread at all.
+_STDIN_FILE_MIN = 64 * 1024
+
+
+# How long reader threads may keep draining after a timed-out CLI was killed.
+# A process that escaped the kill (e.g. one that started its own session)
+# can hold the pipes open indefinitely; the call must not wait for it.
+_POST_KILL_DRAIN = 2.0
+
+
+def _kill_process_tree(pid: int) -> None:
+    """Kill a CLI started with start_new_session=True and everything it spawned.
+    
+    CLIs run tools as child processes (Codex shell commands, dev servers);
+    killing only the CLI would leave those holding its stdout/stderr open.
+    """
+    try:
+        if os.name == "nt":
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(pid)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=_CREATE_NO_WINDOW,
             )
-            if result.returncode != 0:
-                logger.debug("CLI '%s' --version failed with code %d", exe, result.returncode)
-                return None
-        except (subprocess.TimeoutExpired, OSError, Exception) as e:
-            logger.debug("CLI '%s' --version raised %s: %s", exe, type(e).__name__, e)
-            return None
+        else:
+            os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        # Already gone (or taskkill unavailable); the caller still kills pid itself
+        pass
+
+
+def _stdin_file(data: bytes) -> Any:
+    """Return a readable file positioned at the start of data, for use as stdin.
     
-    return exe
+    An anonymous memory file (memfd) is used where available (Linux), so
+    nothing touches the disk; elsewhere an unnamed temporary file. The
+    caller closes it once the child has been spawned.
+    """
+    if hasattr(os, "memfd_create"):
+        f = os.fdopen(os.memfd_create("cli_subagent_task", os.MFD_CLOEXEC), "w+b")
+    else:
+        f = tempfile.TemporaryFile()
+    try:
+        f.write(data)
+        f.seek(0)
+    except BaseException:
+        f.close()
+        raise
+    return f
+
+
+def _write_stdin_direct(stream: Any, data: bytes) -> None:
+    """Write a small task to the child's stdin in one syscall and close it."""
+    try:
+        if data:
+            os.write(stream.fileno(), data)
+    except OSError:
+        # Child exited before reading its input (BrokenPipe / EINVAL on Windows)
+        pass
+    finally:
+        try:
+            stream.close()
+        except OSError:
+            pass
+
+
+def _feed_stdin(stream: Any, data: bytes) -> None:
+    """Write the task to the child's stdin and close it (writer thread body)."""
+    try:
+        stream.write(data)
+        stream.close()
+    except OSError:
+        # Child exited without consuming all input (BrokenPipe / EINVAL on Windows)
+        pass
+
+
+def _drain_stream(stream: Any, sink: List[bytes], failures: List[BaseException]) -> None:
+    """Read a binary stream chunk by chunk into sink until EOF (reader thread body)."""
+    try:
+        for chunk in iter(lambda: stream.read1(65536), b""):
+            sink.append(chunk)
+    except Exception as e:
+        # Surfaced to the caller after the thread is joined
+        failures.append(e)
+    finally:
+        stream.close()
+
+
+def _drain_lines(stream: Any, sink: Callable[[bytes], None], failures: List[BaseException]) -> None:
+    """Hand each raw stdout line to sink as it arrives (reader thread body).
+    
+    Lines are passed undecoded; the sink decodes only what it keeps.
+    If sink raises, the failure is recorded and the rest of the stream is
+    still drained so the child never blocks on a full pipe.
+    """
+    try:
+        for raw in stream:
+            if failures:
+                continue
+            try:
+                sink(raw)
+            except Exception as e:
+                failures.append(e)
+    except Exception as e:
+        failures.append(e)
+    finally:
+        stream.close()
 
 
 # Legacy alias for backwards compatibility
-@lru_cache(maxsize=16)
+@cache
 def find_cli_executable(name: str) -> Optional[str]:
     """Find CLI executable (DEPRECATED).
     
+    A PATH lookup only; no `--version` subprocess is spawned.
+    
     .. deprecated::
         Use resolve_cli_executable() directly for more control.
     """
@@ -184,10 +726,10 @@ def find_cli_executable(name: str) -> Optional[str]:
         DeprecationWarning,
         stacklevel=2
     )
-    return resolve_cli_executable(name, verify_version=True)
+    return resolve_cli_executable(name, verify_version=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentResult:
     """Standardized result from any CLI agent call.
     
@@ -232,7 +774,7 @@ class AgentResult:
         return self.stats.get("per_model", {})
 
 
-@dataclass
+@dataclass(slots=True)
 class CLIProfile:
     """Configuration profile for a specific CLI tool.
     
@@ -248,6 +790,23 @@ class CLIProfile:
         file_mode_override_name: Filename to use when copying prompt to temp dir (Codex: AGENTS.override.md).
         dir_mode_system_file: Expected system prompt path relative to workspace dir.
         model: Optional model name override.
+        session_command_template: EXPERIMENTAL. Command for a long-lived session
+            process that accepts many prompts over stdin (same placeholders as
+            command_template). Neither Gemini nor Codex implements the delimiter
+            protocol, so no built-in profile sets this; it exists for custom CLI
+            wrappers and is not part of the cross-implementation spec. Empty if
+            the CLI has no such mode; agents then spawn one process per call.
+        session_delimiter: EXPERIMENTAL. Line written after each prompt in session
+            mode; the CLI must echo it on its own stdout line once the response
+            is complete.
+        inprocess_callable: Optional in-process backend, called as
+            (task_content, system_prompt_path, model) -> AgentResult. When set,
+            agents skip building and spawning the CLI entirely.
+        stream_parser: Optional zero-argument factory for an incremental parser
+            with feed(line) and result(stderr, returncode) -> AgentResult. When
+            set, one-shot call()s feed it each raw (undecoded bytes) stdout line
+            while the CLI runs instead of buffering and decoding stdout; other
+            paths still use output_parser.
     """
     name: str
     command_template: List[str]
@@ -257,6 +816,10 @@ class CLIProfile:
     file_mode_override_name: str = ""  # e.g., "AGENTS.override.md" for Codex
     dir_mode_system_file: str = ""     # e.g., "AGENTS.md" or ".gemini/system.md"
     model: Optional[str] = None
+    session_command_template: List[str] = field(default_factory=list)
+    session_delimiter: str = ""
+    inprocess_callable: Optional[Callable[[str, Path, Optional[str]], AgentResult]] = None
+    stream_parser: Optional[Callable[[], Any]] = None
 
 
 class InputMode(Enum):
@@ -265,6 +828,229 @@ class InputMode(Enum):
     DIRECTORY = "directory" # Workspace directory with expected structure
 
 
+class _CLISession:
+    """A long-lived CLI process that serves many prompts over stdin/stdout.
+    
+    EXPERIMENTAL: the delimiter protocol is this library's own; no shipped
+    CLI speaks it, so it only runs for custom session_command_template profiles.
+    
+    Each request writes the prompt followed by the delimiter on its own line,
+    then reads stdout until the CLI echoes the delimiter line back. Requests
+    are serialized; a timed-out session is killed since its state is unknown.
+    """
+    
+    def __init__(
+        self,
+        cmd: List[str],
+        env: Dict[str, str],
+        cwd: Optional[Path],
+        delimiter: str,
+        model: Optional[str],
+    ):
+        self.delimiter = delimiter
+        self.model = model
+        self.temp_dir: Optional[Path] = None  # Workdir to release on close (owner-managed)
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",  # Like _decode_output(): a bad byte must not kill the session
+            env=env,
+            cwd=str(cwd) if cwd else None,
+            creationflags=_CREATE_NO_WINDOW,
+        )
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._stderr: Deque[str] = deque(maxlen=100)
+        self._lock = threading.Lock()
+        threading.Thread(target=self._pump_stdout, daemon=True).start()
+        threading.Thread(target=self._pump_stderr, daemon=True).start()
+    
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+    
+    def _pump_stdout(self) -> None:
+        try:
+            for line in self.proc.stdout:
+                self._lines.put(line)
+        except Exception as e:
+            logger.debug("CLI session stdout reader stopped: %s", e)
+        finally:
+            # EOF marker: the CLI exited (or its output became unreadable)
+            self._lines.put(None)
+            self.proc.stdout.close()
+    
+    def _pump_stderr(self) -> None:
+        try:
+            for line in self.proc.stderr:
+                self._stderr.append(line)
+        except Exception as e:
+            logger.debug("CLI session stderr reader stopped: %s", e)
+        finally:
+            self.proc.stderr.close()
+    
+    def request(self, task_content: str, timeout: int) -> Tuple[int, str, str]:
+        """Send one prompt and collect its response.
+        
+        Returns:
+            (returncode, stdout, stderr) shaped like a one-shot invocation.
+            returncode is 0 unless the CLI exited before completing the turn.
+        """
+        with self._lock:
+            deadline = time.monotonic() + timeout
+            try:
+                self.proc.stdin.write(f"{task_content}\n{self.delimiter}\n")
+                self.proc.stdin.flush()
+            except OSError:
+                # CLI already exited; the EOF marker below reports it
+                pass
+            
+            out: List[str] = []
+            while True:
+                try:
+                    line = self._lines.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    self.close(graceful=False)
+                    raise subprocess.TimeoutExpired(self.proc.args, timeout) from None
+                if line is None:
+                    return self.proc.wait(), "".join(out), "".join(self._stderr)
+                if line.rstrip("\r\n") == self.delimiter:
+                    return 0, "".join(out), ""
+                out.append(line)
+    
+    def close(self, graceful: bool = True) -> None:
+        """Terminate the CLI process (closing stdin first when graceful).
+        
+        The stdout/stderr pipes are closed by their reader threads at EOF.
+        """
+        if graceful and self.proc.poll() is None:
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        if self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+
+
+class ResultCache:
+    """Client-side cache of successful AgentResults.
+    
+    An in-memory LRU, optionally backed by a SQLite file so results survive
+    restarts and can be shared between processes. Only ok results are
+    stored; failures are always retried. Both tiers hold the result's JSON
+    encoding, so callers never share stats/error dicts with the cache or with
+    each other. Thread-safe.
+    
+    Example:
+        >>> cache = ResultCache(maxsize=512, path="~/.cache/cli_subagent/results.db")
+        >>> agent = UniversalCLIAgent.from_path(GEMINI_PROFILE, "a", "./a.md", cache=cache)
+    """
+    
+    def __init__(self, maxsize: int = 256, path: Optional[Union[str, Path]] = None):
+        """Create the cache.
+        
+        Args:
+            maxsize: Maximum number of results kept in memory.
+            path: Optional SQLite database file for a persistent second tier.
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, str]" = OrderedDict()  # key -> result JSON
+        self._lock = threading.Lock()
+        self._db: Any = None
+        if path is not None:
+            import sqlite3  # Only needed for the on-disk tier
+            db_path = Path(path).expanduser()
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._db.commit()
+    
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Hash the parts (length-prefixed, so boundaries are unambiguous)."""
+        h = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            data = part.encode("utf-8")
+            h.update(len(data).to_bytes(8, "little"))
+            h.update(data)
+        return h.hexdigest()
+    
+    def get(self, key: str) -> Optional[AgentResult]:
+        """Return a fresh copy of the cached result for key, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value = row[0]
+                    self._remember(key, value)
+        if value is None:
+            return None
+        return AgentResult(**json.loads(value))
+    
+    def put(self, key: str, result: AgentResult) -> None:
+        """Store a snapshot of a successful result (failed results are ignored).
+        
+        Results whose stats hold values JSON cannot encode (a custom parser's
+        objects, say) are not cached rather than failing the call.
+        """
+        if not result.ok:
+            return
+        try:
+            value = json.dumps({
+                "ok": result.ok,
+                "content": result.content,
+                "stats": result.stats,
+                "error": result.error,
+            })
+        except (TypeError, ValueError) as e:
+            logger.debug("Result not cached, not JSON-serializable: %s", e)
+            return
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, value)
+                )
+                self._db.commit()
+    
+    def _remember(self, key: str, value: str) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop every cached result (both tiers)."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+    
+    def close(self) -> None:
+        """Close the SQLite connection, if any."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
 class UniversalCLIAgent:
     """Universal CLI agent that can invoke any LLM CLI through profile configuration.
     
@@ -304,6 +1090,7 @@ class UniversalCLIAgent:
         agent_prompt_path: Optional[Path] = None,
         agent_workspace: Optional[Path] = None,
         model: Optional[str] = None,
+        cache: Optional["ResultCache"] = None,
     ):
         """Initialize the CLI agent.
         
@@ -313,6 +1100,7 @@ class UniversalCLIAgent:
             agent_prompt_path: Path to the agent system prompt file (file mode).
             agent_workspace: Path to the workspace directory (directory mode).
             model: Optional model name to use (passed as -m flag to CLI).
+            cache: Optional ResultCache; identical calls are then answered from it.
             
         Raises:
             ValueError: If neither or both agent_prompt_path and agent_workspace are provided.
@@ -321,6 +1109,7 @@ class UniversalCLIAgent:
         self.profile = profile
         self.agent_name = agent_name
         self.model = model
+        self.cache = cache
         
         # Validate input mode
         if agent_prompt_path and agent_workspace:
@@ -330,25 +1119,93 @@ class UniversalCLIAgent:
         
         if agent_prompt_path:
             self.mode = InputMode.FILE
-            self.agent_prompt_path = Path(agent_prompt_path).resolve()
+            self.agent_prompt_path = _absolute_path(agent_prompt_path)
             self.agent_workspace = None
-            if not self.agent_prompt_path.exists():
+            if _stat_or_none(self.agent_prompt_path) is None:
                 raise FileNotFoundError(f"Agent prompt file not found: {self.agent_prompt_path}")
         else:
             self.mode = InputMode.DIRECTORY
-            self.agent_workspace = Path(agent_workspace).resolve()
+            self.agent_workspace = _absolute_path(agent_workspace)
             self.agent_prompt_path = None
-            if not self.agent_workspace.exists():
+            st = _stat_or_none(self.agent_workspace)
+            if st is None:
                 raise FileNotFoundError(f"Agent workspace not found: {self.agent_workspace}")
-            if not self.agent_workspace.is_dir():
+            if not stat.S_ISDIR(st.st_mode):
                 raise ValueError(f"Agent workspace must be a directory: {self.agent_workspace}")
             # Validate system prompt file exists in directory mode
             expected_prompt = self.agent_workspace / self.profile.dir_mode_system_file
-            if self.profile.dir_mode_system_file and not expected_prompt.exists():
+            if self.profile.dir_mode_system_file and _stat_or_none(expected_prompt) is None:
                 raise FileNotFoundError(
                     f"System prompt not found in workspace: {expected_prompt}\n"
                     f"Expected location based on profile '{self.profile.name}': {self.profile.dir_mode_system_file}"
                 )
+        
+        # Pre-substitute per-agent constants; only {temp_dir} varies per call
+        if self.mode == InputMode.DIRECTORY and self.agent_workspace:
+            # In directory mode, use the expected system file path
+            prompt_path = self.agent_workspace / self.profile.dir_mode_system_file
+        else:
+            prompt_path = self.agent_prompt_path or Path("")
+        self._prompt_path_str = str(prompt_path)
+        self._cmd_template_resolved = [
+            _compile_template(part, self._prompt_path_str)
+            for part in self.profile.command_template
+        ]
+        self._session_cmd_template_resolved = [
+            _compile_template(part, self._prompt_path_str)
+            for part in self.profile.session_command_template
+        ]
+        self._env_template_resolved = {
+            key: _compile_template(value, self._prompt_path_str)
+            for key, value in self.profile.env_vars.items()
+        }
+        
+        # Base subprocess environment: process env + extended PATH + the
+        # profile env vars that do not depend on {temp_dir}. Captured once,
+        # so later changes to os.environ do not affect this agent.
+        self._base_env: Dict[str, str] = {**os.environ, "PATH": build_extended_path()}
+        self._env_temp_dir_templates: Dict[str, Tuple[str, ...]] = {}
+        for key, compiled in self._env_template_resolved.items():
+            if isinstance(compiled, str):
+                self._base_env[key] = compiled
+            else:
+                self._env_temp_dir_templates[key] = compiled
+        
+        # Reusable temp dir for file mode CLIs that need one (e.g., Codex).
+        # Prepared lazily on first call; concurrent calls fall back to fresh dirs.
+        self._persistent_temp_dir: Optional[Path] = None
+        self._persistent_temp_dir_busy = False
+        self._workdir_lock = threading.Lock()
+        # Digest of the system prompt for result cache keys, with the
+        # (mtime_ns, size) it was computed from
+        self._prompt_digest: Optional[Tuple[Tuple[int, int], str]] = None
+        
+        # mtime of the prompt when it was last placed in the persistent temp
+        # dir, and (inode, mtime_ns, size) of the placed copy right after
+        self._prompt_mtime_ns: Optional[int] = None
+        self._placed_prompt_key: Optional[Tuple[int, int, int]] = None
+        # Names _prepare_temp_dir() writes into a temp dir (fast cleanup path)
+        self._temp_files: Tuple[str, ...] = (
+            (self.profile.file_mode_override_name,)
+            if self.profile.file_mode_override_name and self.agent_prompt_path
+            else ()
+        )
+        
+        # Executables resolved for this agent's templates, keyed by template name.
+        # Pinned up front when the CLI is already on PATH so call() skips the
+        # lookup; a missing CLI is only reported (and retried) at call time.
+        self._resolved_cli: Dict[str, str] = {}
+        for template in (self._cmd_template_resolved, self._session_cmd_template_resolved):
+            if template and isinstance(template[0], str) and template[0] not in self._resolved_cli:
+                cli_path = _locate_cli(template[0], self._base_env["PATH"])
+                if cli_path:
+                    self._resolved_cli[template[0]] = cli_path
+        
+        # Warm pool of long-lived CLI sessions (see start()); calls that find
+        # no idle session spawn a one-shot process instead
+        self._sessions: List[_CLISession] = []
+        self._idle_sessions: Deque[_CLISession] = deque()
+        self._session_lock = threading.Lock()
     
     @classmethod
     def from_file(
@@ -357,6 +1214,7 @@ class UniversalCLIAgent:
         agent_name: str,
         agent_prompt_path: Union[str, Path],
         model: Optional[str] = None,
+        cache: Optional["ResultCache"] = None,
     ) -> "UniversalCLIAgent":
         """Create an agent in file mode with a single system prompt file.
         
@@ -365,6 +1223,7 @@ class UniversalCLIAgent:
             agent_name: A human-readable name for logging/debugging.
             agent_prompt_path: Path to the agent system prompt file.
             model: Optional model name to use (passed as -m flag to CLI).
+            cache: Optional ResultCache shared by the agent's calls.
             
         Returns:
             A configured UniversalCLIAgent instance.
@@ -374,6 +1233,7 @@ class UniversalCLIAgent:
             agent_name=agent_name,
             agent_prompt_path=Path(agent_prompt_path),
             model=model,
+            cache=cache,
         )
     
     @classmethod
@@ -383,6 +1243,7 @@ class UniversalCLIAgent:
         agent_name: str,
         agent_workspace: Union[str, Path],
         model: Optional[str] = None,
+        cache: Optional["ResultCache"] = None,
     ) -> "UniversalCLIAgent":
         """Create an agent in directory mode with a workspace directory.
         
@@ -395,6 +1256,7 @@ class UniversalCLIAgent:
             agent_name: A human-readable name for logging/debugging.
             agent_workspace: Path to the workspace directory.
             model: Optional model name to use (passed as -m flag to CLI).
+            cache: Optional ResultCache shared by the agent's calls.
             
         Returns:
             A configured UniversalCLIAgent instance.
@@ -404,6 +1266,7 @@ class UniversalCLIAgent:
             agent_name=agent_name,
             agent_workspace=Path(agent_workspace),
             model=model,
+            cache=cache,
         )
     
     @classmethod
@@ -413,6 +1276,7 @@ class UniversalCLIAgent:
         agent_name: str,
         path: Union[str, Path],
         model: Optional[str] = None,
+        cache: Optional["ResultCache"] = None,
     ) -> "UniversalCLIAgent":
         """Auto-detect input type and create agent in appropriate mode.
         
@@ -424,6 +1288,7 @@ class UniversalCLIAgent:
             agent_name: A human-readable name for logging/debugging.
             path: Path to either a system prompt file or workspace directory.
             model: Optional model name to use (passed as -m flag to CLI).
+            cache: Optional ResultCache shared by the agent's calls.
             
         Returns:
             A configured UniversalCLIAgent instance.
@@ -431,14 +1296,15 @@ class UniversalCLIAgent:
         Raises:
             FileNotFoundError: If the path does not exist.
         """
-        resolved = Path(path).resolve()
-        if not resolved.exists():
+        resolved = _absolute_path(path)
+        st = _stat_or_none(resolved)
+        if st is None:
             raise FileNotFoundError(f"Path not found: {resolved}")
         
-        if resolved.is_dir():
-            return cls.from_directory(profile, agent_name, resolved, model=model)
+        if stat.S_ISDIR(st.st_mode):
+            return cls.from_directory(profile, agent_name, resolved, model=model, cache=cache)
         else:
-            return cls.from_file(profile, agent_name, resolved, model=model)
+            return cls.from_file(profile, agent_name, resolved, model=model, cache=cache)
     
     def call(
         self,
@@ -458,19 +1324,38 @@ class UniversalCLIAgent:
         """
         # Model priority: call() > __init__() > profile.model
         effective_model = model or self.model or self.profile.model
+        if self.cache is None:
+            return self._call_uncached(task_content, timeout, model, effective_model)
+        
+        cache_key = self._cache_key(task_content, effective_model)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Result cache hit for agent '%s'", self.agent_name)
+            return cached
+        result = self._call_uncached(task_content, timeout, model, effective_model)
+        if result.ok:
+            self.cache.put(cache_key, result)
+        return result
+    
+    def _call_uncached(
+        self,
+        task_content: str,
+        timeout: int,
+        model: Optional[str],
+        effective_model: Optional[str],
+    ) -> AgentResult:
+        """call() without the result cache."""
+        if self.profile.inprocess_callable is not None:
+            return self._call_inprocess(task_content, effective_model)
+        
+        session = self._acquire_session(model)
+        if session is not None:
+            return self._call_session(session, task_content, timeout)
+        
         temp_dir: Optional[Path] = None
-        cwd: Optional[Path] = None
         
         try:
-            # Determine working directory and temp dir based on mode
-            if self.mode == InputMode.DIRECTORY:
-                # Directory mode: use workspace as cwd, no temp dir needed
-                cwd = self.agent_workspace
-            elif self.profile.requires_temp_dir:
-                # File mode with temp dir requirement (e.g., Codex)
-                temp_dir = Path(tempfile.mkdtemp(prefix=f"cli_agent_{self.profile.name}_"))
-                self._prepare_temp_dir(temp_dir)
-                cwd = temp_dir
+            temp_dir, cwd = self._setup_workdir()
             
             # Build environment variables
             env = self._build_env(temp_dir)
@@ -478,33 +1363,472 @@ class UniversalCLIAgent:
             # Build command (pass env for extended PATH resolution)
             cmd = self._build_command(temp_dir, env, effective_model)
             
+            # Parse stdout as it arrives when the profile supports it
+            parser = self.profile.stream_parser() if self.profile.stream_parser else None
+            line_sink = parser.feed if parser is not None else None
+            
             # Execute subprocess
             logger.debug("Executing: %s (cwd=%s)", cmd, cwd)
-            result = subprocess.run(
-                cmd,
-                input=task_content,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                env=env,
-                cwd=str(cwd) if cwd else None,
-                encoding="utf-8",
-            )
-
-            # Parse output using profile-specific parser
-            logger.debug(
-                "CLI returned: code=%d, stdout=%d bytes, stderr=%d bytes",
-                result.returncode, len(result.stdout or ""), len(result.stderr or "")
-            )
-            parsed = self.profile.output_parser(
-                result.stdout,
-                result.stderr,
-                result.returncode,
-            )
-            logger.debug("Parsed result: ok=%s, tokens=%d", parsed.ok, parsed.total_tokens)
-            return parsed
+            try:
+                result = self._run_subprocess(cmd, task_content, timeout, env, cwd, line_sink)
+            except FileNotFoundError:
+                # Cached executable may be stale (CLI moved or uninstalled):
+                # re-resolve with --version verification and retry once
+                logger.debug("CLI '%s' vanished, re-resolving with verification", cmd[0])
+                invalidate_cli_cache()
+                cmd = self._build_command(temp_dir, env, effective_model, verify_version=True)
+                result = self._run_subprocess(cmd, task_content, timeout, env, cwd, line_sink)
+            
+            if parser is not None:
+                return self._parse_streamed(parser, result.stderr, result.returncode)
+            return self._parse_output(result.stdout, result.stderr, result.returncode)
+            
+        except Exception as e:
+            return self._error_result(e, timeout)
+        finally:
+            self._release_workdir(temp_dir)
+    
+    def call_many(
+        self,
+        tasks: List[str],
+        timeout: int = 300,
+        model: Optional[str] = None,
+        max_concurrency: int = 8,
+    ) -> List[AgentResult]:
+        """Run several independent tasks concurrently through call() on threads.
+        
+        The synchronous counterpart of acall_many(): each worker thread
+        mostly waits on its CLI subprocess, so N tasks take roughly the time
+        of the slowest batch rather than the sum.
+        
+        Args:
+            tasks: Task prompts to send, one CLI invocation each.
+            timeout: Per-task timeout in seconds.
+            model: Optional model override applied to every task.
+            max_concurrency: Maximum number of CLI subprocesses alive at once.
+            
+        Returns:
+            List of AgentResult in the same order as tasks.
+        """
+        if not tasks:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=min(max_concurrency, len(tasks)),
+            thread_name_prefix=f"cli_agent_{self.agent_name}",
+        ) as executor:
+            return list(executor.map(
+                lambda task_content: self.call(task_content, timeout=timeout, model=model),
+                tasks,
+            ))
+    
+    async def acall(
+        self,
+        task_content: str,
+        timeout: int = 300,
+        model: Optional[str] = None,
+    ) -> AgentResult:
+        """Asynchronously invoke the CLI with the given task content.
+        
+        Same semantics as call(), but the subprocess is driven by asyncio so
+        many agent calls can overlap on a single event loop.
+        
+        Args:
+            task_content: The prompt/task to send to the LLM.
+            timeout: Maximum seconds to wait for the CLI to complete.
+            model: Optional model override (takes precedence over __init__ model).
+            
+        Returns:
+            AgentResult with the response content and stats.
+        """
+        effective_model = model or self.model or self.profile.model
+        if self.cache is None:
+            return await self._acall_uncached(task_content, timeout, model, effective_model)
+        
+        cache_key = await asyncio.to_thread(self._cache_key, task_content, effective_model)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Result cache hit for agent '%s'", self.agent_name)
+            return cached
+        result = await self._acall_uncached(task_content, timeout, model, effective_model)
+        if result.ok:
+            self.cache.put(cache_key, result)
+        return result
+    
+    async def _acall_uncached(
+        self,
+        task_content: str,
+        timeout: int,
+        model: Optional[str],
+        effective_model: Optional[str],
+    ) -> AgentResult:
+        """acall() without the result cache."""
+        if self.profile.inprocess_callable is not None:
+            return await asyncio.to_thread(self._call_inprocess, task_content, effective_model)
+        
+        session = self._acquire_session(model)
+        if session is not None:
+            return await asyncio.to_thread(self._call_session, session, task_content, timeout)
+        
+        temp_dir: Optional[Path] = None
+        
+        try:
+            temp_dir, cwd = self._setup_workdir()
+            env = self._build_env(temp_dir)
+            cmd = self._build_command(temp_dir, env, effective_model)
+            
+            logger.debug("Executing (async): %s (cwd=%s)", cmd, cwd)
+            try:
+                returncode, stdout, stderr = await self._run_subprocess_async(
+                    cmd, task_content, timeout, env, cwd
+                )
+            except FileNotFoundError:
+                logger.debug("CLI '%s' vanished, re-resolving with verification", cmd[0])
+                invalidate_cli_cache()
+                cmd = self._build_command(temp_dir, env, effective_model, verify_version=True)
+                returncode, stdout, stderr = await self._run_subprocess_async(
+                    cmd, task_content, timeout, env, cwd
+                )
             
-        except subprocess.TimeoutExpired:
+            return self._parse_output(stdout, stderr, returncode)
+            
+        except Exception as e:
+            return self._error_result(e, timeout)
+        finally:
+            self._release_workdir(temp_dir)
+    
+    async def acall_many(
+        self,
+        tasks: List[str],
+        timeout: int = 300,
+        model: Optional[str] = None,
+        max_concurrency: int = 8,
+    ) -> List[AgentResult]:
+        """Run several independent tasks concurrently through acall().
+        
+        Args:
+            tasks: Task prompts to send, one CLI invocation each.
+            timeout: Per-task timeout in seconds.
+            model: Optional model override applied to every task.
+            max_concurrency: Maximum number of CLI subprocesses alive at once.
+            
+        Returns:
+            List of AgentResult in the same order as tasks.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run_one(task_content: str) -> AgentResult:
+            async with semaphore:
+                return await self.acall(task_content, timeout=timeout, model=model)
+        
+        return list(await asyncio.gather(*(run_one(task) for task in tasks)))
+    
+    def start(self, sessions: int = 1) -> bool:
+        """Start long-lived CLI sessions that subsequent calls reuse.
+        
+        Pays CLI startup (interpreter load, auth, config parse) once instead
+        of on every call. Up to `sessions` calls run on warm processes at
+        once; further concurrent calls spawn a one-shot process. Sessions
+        that exit are replaced when next picked. Only profiles with a
+        session_command_template support this; for others the agent keeps
+        spawning one process per call. Calling start() again tops the pool
+        back up to `sessions`.
+        
+        EXPERIMENTAL: the built-in GEMINI_PROFILE and CODEX_PROFILE have no
+        session mode, so for them this is a no-op that returns False.
+        
+        Args:
+            sessions: Number of warm CLI processes to keep for this agent.
+        
+        Returns:
+            True if sessions are running, False if the profile has no session mode.
+        """
+        if not self._session_cmd_template_resolved or not self.profile.session_delimiter:
+            logger.debug("Profile '%s' has no session mode, spawning per call", self.profile.name)
+            return False
+        with self._session_lock:
+            dead = [session for session in self._sessions if not session.alive]
+            for session in dead:
+                self._sessions.remove(session)
+                if session in self._idle_sessions:
+                    self._idle_sessions.remove(session)
+            missing = sessions - len(self._sessions)
+        for session in dead:
+            self._discard_session(session)
+        for _ in range(missing):
+            session = self._spawn_session()
+            with self._session_lock:
+                self._sessions.append(session)
+                self._idle_sessions.append(session)
+        return True
+    
+    def stop(self) -> None:
+        """Stop every CLI session started by start()."""
+        with self._session_lock:
+            sessions, self._sessions = self._sessions, []
+            self._idle_sessions.clear()
+        for session in sessions:
+            self._discard_session(session)
+    
+    def close(self) -> None:
+        """Stop sessions and delete the agent's persistent temp dir.
+        
+        The agent stays usable; a later call simply prepares a new temp dir.
+        A call still in flight removes the dir itself when it finishes.
+        """
+        self.stop()
+        with self._workdir_lock:
+            temp_dir, self._persistent_temp_dir = self._persistent_temp_dir, None
+            busy, self._persistent_temp_dir_busy = self._persistent_temp_dir_busy, False
+        if temp_dir is not None and not busy:
+            _discard_temp_dir(temp_dir, self._temp_files)
+    
+    def __enter__(self) -> "UniversalCLIAgent":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+    
+    def _spawn_session(self) -> _CLISession:
+        """Start one session process in its own workdir."""
+        effective_model = self.model or self.profile.model
+        temp_dir, cwd = self._setup_workdir()
+        try:
+            env = self._build_env(temp_dir)
+            cmd = self._build_command(
+                temp_dir, env, effective_model, template=self._session_cmd_template_resolved
+            )
+            logger.debug("Starting session: %s (cwd=%s)", cmd, cwd)
+            session = _CLISession(cmd, env, cwd, self.profile.session_delimiter, effective_model)
+        except BaseException:
+            self._release_workdir(temp_dir)
+            raise
+        session.temp_dir = temp_dir
+        return session
+    
+    def _discard_session(self, session: _CLISession) -> None:
+        session.close()
+        self._release_workdir(session.temp_dir)
+    
+    def _acquire_session(self, model: Optional[str]) -> Optional[_CLISession]:
+        """Take an idle session that can serve a call with this model override.
+        
+        Returns None when sessions are not started, all are busy, or the
+        model override differs from the sessions' model; the caller then
+        spawns a one-shot process. A session found dead is replaced.
+        """
+        with self._session_lock:
+            if not self._idle_sessions:
+                return None
+            if model and model != self._idle_sessions[0].model:
+                return None
+            session = self._idle_sessions.popleft()
+            if session.alive:
+                return session
+            self._sessions.remove(session)
+        logger.debug("CLI session for '%s' exited, starting a replacement", self.agent_name)
+        self._discard_session(session)
+        try:
+            session = self._spawn_session()
+        except Exception as e:
+            logger.debug("Could not replace CLI session: %s", e)
+            return None
+        with self._session_lock:
+            self._sessions.append(session)
+        return session
+    
+    def _release_session(self, session: _CLISession) -> None:
+        """Return a session to the idle pool after a call."""
+        with self._session_lock:
+            if session in self._sessions:
+                self._idle_sessions.append(session)
+                return
+        # stop() ran while the call was in flight
+        self._discard_session(session)
+    
+    def _call_session(self, session: _CLISession, task_content: str, timeout: int) -> AgentResult:
+        """Send one task through a CLI session, then return it to the pool."""
+        try:
+            returncode, stdout, stderr = session.request(task_content, timeout)
+        except Exception as e:
+            return self._error_result(e, timeout)
+        finally:
+            self._release_session(session)
+        return self._parse_output(stdout, stderr, returncode)
+    
+    def _call_inprocess(self, task_content: str, model: Optional[str]) -> AgentResult:
+        """Serve one task through the profile's in-process backend (no subprocess).
+        
+        The call timeout is not enforced here; the backend applies its own.
+        """
+        try:
+            return self.profile.inprocess_callable(task_content, Path(self._prompt_path_str), model)
+        except Exception as e:
+            return self._error_result(e, 0)
+    
+    def _setup_workdir(self) -> Tuple[Optional[Path], Optional[Path]]:
+        """Determine (temp_dir, cwd) for one invocation based on mode.
+        
+        In file mode with a temp dir requirement, the agent's persistent temp
+        dir is reused when idle, so the mkdtemp + prompt copy happen once per
+        agent rather than once per call. Overlapping calls get a fresh
+        per-call dir to keep their working directories isolated.
+        """
+        if self.mode == InputMode.DIRECTORY:
+            # Directory mode: use workspace as cwd, no temp dir needed
+            return None, self.agent_workspace
+        if not self.profile.requires_temp_dir:
+            return None, None
+        
+        with self._workdir_lock:
+            if not self._persistent_temp_dir_busy:
+                if self._persistent_temp_dir is None:
+                    temp_dir, self._prompt_mtime_ns = self._make_temp_dir()
+                    self._placed_prompt_key = self._placed_prompt_stat(temp_dir)
+                    with _LIVE_TEMP_DIRS_LOCK:
+                        _LIVE_TEMP_DIRS[temp_dir] = self._temp_files
+                    self._persistent_temp_dir = temp_dir
+                else:
+                    self._refresh_prompt_copy(self._persistent_temp_dir)
+                self._persistent_temp_dir_busy = True
+                return self._persistent_temp_dir, self._persistent_temp_dir
+        
+        temp_dir, _ = self._make_temp_dir()
+        return temp_dir, temp_dir
+    
+    def _refresh_prompt_copy(self, temp_dir: Path) -> None:
+        """Re-place the prompt file in a reused temp dir if either copy changed.
+        
+        Costs two stats per call. The prompt is copied again when the source
+        was edited (new mtime) or when the placed copy no longer matches what
+        was written: a CLI may modify or replace the file in its working dir,
+        and the next call must not run with that prompt.
+        """
+        if not self._temp_files:
+            return
+        st = _stat_or_none(self.agent_prompt_path)
+        source_changed = st is not None and st.st_mtime_ns != self._prompt_mtime_ns
+        if not source_changed and self._placed_prompt_stat(temp_dir) == self._placed_prompt_key:
+            return
+        logger.debug("Prompt %s or its placed copy changed, refreshing", self.agent_prompt_path)
+        try:
+            try:
+                os.unlink(temp_dir / self.profile.file_mode_override_name)
+            except FileNotFoundError:
+                pass
+            self._prompt_mtime_ns = self._prepare_temp_dir(temp_dir)
+            self._placed_prompt_key = self._placed_prompt_stat(temp_dir)
+        except BaseException:
+            # Leave no half-prepared dir behind; the next call makes a new one
+            self._persistent_temp_dir = None
+            _discard_temp_dir(temp_dir, self._temp_files)
+            raise
+    
+    def _placed_prompt_stat(self, temp_dir: Path) -> Optional[Tuple[int, int, int]]:
+        """(inode, mtime_ns, size) of the prompt copy in temp_dir, or None if missing."""
+        st = _stat_or_none(temp_dir / self.profile.file_mode_override_name)
+        return (st.st_ino, st.st_mtime_ns, st.st_size) if st else None
+    
+    def _make_temp_dir(self) -> Tuple[Path, Optional[int]]:
+        """Create and prepare a temp dir for file mode (e.g., Codex).
+        
+        Returns:
+            (temp_dir, prompt mtime_ns as placed, or None).
+        """
+        temp_dir = Path(tempfile.mkdtemp(prefix=f"cli_agent_{self.profile.name}_"))
+        try:
+            prompt_mtime_ns = self._prepare_temp_dir(temp_dir)
+        except BaseException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+        return temp_dir, prompt_mtime_ns
+    
+    def _release_workdir(self, temp_dir: Optional[Path]) -> None:
+        """Release a temp dir obtained from _setup_workdir()."""
+        if temp_dir is None:
+            return
+        if temp_dir != self._persistent_temp_dir:
+            # Per-call dir for an overlapping call, or the persistent dir of
+            # an agent closed while this call was running
+            _discard_temp_dir(temp_dir, self._temp_files)
+            return
+        # Drop anything the CLI wrote so the next call starts from a clean dir
+        try:
+            with os.scandir(temp_dir) as entries:
+                for entry in entries:
+                    if entry.name == self.profile.file_mode_override_name:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.unlink(entry.path)
+        except OSError as e:
+            # Could not scrub: discard the dir, the next call prepares a new one
+            logger.debug("Discarding temp dir %s: %s", temp_dir, e)
+            with _LIVE_TEMP_DIRS_LOCK:
+                _LIVE_TEMP_DIRS.pop(temp_dir, None)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            with self._workdir_lock:
+                self._persistent_temp_dir = None
+        with self._workdir_lock:
+            self._persistent_temp_dir_busy = False
+    
+    def _parse_output(self, stdout: str, stderr: str, returncode: int) -> AgentResult:
+        """Parse CLI output using the profile-specific parser."""
+        logger.debug(
+            "CLI returned: code=%d, stdout=%d bytes, stderr=%d bytes",
+            returncode, len(stdout or ""), len(stderr or "")
+        )
+        parsed = self.profile.output_parser(stdout, stderr, returncode)
+        logger.debug("Parsed result: ok=%s, tokens=%d", parsed.ok, parsed.total_tokens)
+        return parsed
+    
+    def _cache_key(self, task_content: str, effective_model: Optional[str]) -> str:
+        """Result cache key for one call: profile, prompt, working context, model, task.
+        
+        The prompt file is hashed once and re-hashed only when its mtime or
+        size changes, so edits to the system prompt never hit stale entries.
+        The working context is the directory the CLI runs in when it can see
+        user files there (the workspace, or an inherited cwd), so agents on
+        different repositories never share results.
+        """
+        try:
+            st = os.stat(self._prompt_path_str)
+            version = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            version = (0, -1)
+        cached = self._prompt_digest
+        if cached is None or cached[0] != version:
+            try:
+                with open(self._prompt_path_str, "rb") as fp:
+                    digest = hashlib.blake2b(fp.read(), digest_size=16).hexdigest()
+            except OSError:
+                digest = ""
+            cached = self._prompt_digest = (version, digest)
+        if self.mode == InputMode.DIRECTORY:
+            context = str(self.agent_workspace)
+        elif self.profile.requires_temp_dir:
+            context = ""  # Private temp dir holding only the prompt copy
+        else:
+            context = os.getcwd()
+        return ResultCache.make_key(
+            self.profile.name, self.mode.value, cached[1], context,
+            effective_model or "", task_content,
+        )
+    
+    def _parse_streamed(self, parser: Any, stderr: str, returncode: int) -> AgentResult:
+        """Finish a stream parser that was fed stdout while the CLI ran."""
+        logger.debug(
+            "CLI returned: code=%d, stdout=streamed, stderr=%d bytes",
+            returncode, len(stderr or "")
+        )
+        parsed = parser.result(stderr, returncode)
+        logger.debug("Parsed result: ok=%s, tokens=%d", parsed.ok, parsed.total_tokens)
+        return parsed
+    
+    @staticmethod
+    def _error_result(e: Exception, timeout: int) -> AgentResult:
+        """Map an exception raised during invocation to a failed AgentResult."""
+        if isinstance(e, subprocess.TimeoutExpired):
             return AgentResult(
                 ok=False,
                 content="",
@@ -513,7 +1837,7 @@ class UniversalCLIAgent:
                     "message": f"CLI execution timed out after {timeout} seconds",
                 },
             )
-        except FileNotFoundError as e:
+        if isinstance(e, FileNotFoundError):
             return AgentResult(
                 ok=False,
                 content="",
@@ -522,59 +1846,183 @@ class UniversalCLIAgent:
                     "message": f"CLI executable not found: {e}",
                 },
             )
-        except Exception as e:
-            return AgentResult(
-                ok=False,
-                content="",
-                error={
-                    "type": "execution_error",
-                    "exception_type": type(e).__name__,
-                    "message": str(e),
-                },
+        return AgentResult(
+            ok=False,
+            content="",
+            error={
+                "type": "execution_error",
+                "exception_type": type(e).__name__,
+                "message": str(e),
+            },
+        )
+    
+    def _run_subprocess(
+        self,
+        cmd: List[str],
+        task_content: str,
+        timeout: int,
+        env: Dict[str, str],
+        cwd: Optional[Path],
+        line_sink: Optional[Callable[[bytes], None]] = None,
+    ) -> subprocess.CompletedProcess:
+        """Run the CLI once, feeding the task via stdin.
+        
+        stdin is written and stdout/stderr are drained by worker threads while
+        the CLI is still running. Pipes carry raw bytes; output is decoded once
+        at the end rather than through a TextIOWrapper chunk by chunk.
+        
+        With a line_sink, each raw stdout line is handed to it as it arrives
+        and nothing is buffered or decoded (the result's stdout is empty).
+        
+        Tasks of _STDIN_FILE_MIN bytes or more are passed as a file-backed
+        stdin (see _stdin_file) instead of being pushed through the pipe.
+        """
+        task_bytes = task_content.encode("utf-8")
+        stdin_file = _stdin_file(task_bytes) if len(task_bytes) >= _STDIN_FILE_MIN else None
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=stdin_file if stdin_file is not None else subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=env,
+                cwd=str(cwd) if cwd else None,
+                creationflags=_CREATE_NO_WINDOW,
+                start_new_session=True,  # Own process group, see _kill_process_tree()
             )
         finally:
-            # Cleanup temp directory
-            if temp_dir and temp_dir.exists():
-                shutil.rmtree(temp_dir, ignore_errors=True)
+            # The child holds its own descriptor now (or was never spawned)
+            if stdin_file is not None:
+                stdin_file.close()
+        stdout_chunks: List[bytes] = []
+        stderr_chunks: List[bytes] = []
+        failures: List[BaseException] = []
+        if line_sink is not None:
+            stdout_reader = threading.Thread(
+                target=_drain_lines, args=(proc.stdout, line_sink, failures), daemon=True
+            )
+        else:
+            stdout_reader = threading.Thread(
+                target=_drain_stream, args=(proc.stdout, stdout_chunks, failures), daemon=True
+            )
+        workers = [
+            stdout_reader,
+            threading.Thread(target=_drain_stream, args=(proc.stderr, stderr_chunks, failures), daemon=True),
+        ]
+        if stdin_file is None:
+            if len(task_bytes) <= _STDIN_DIRECT_MAX:
+                # Fits in an empty pipe: one non-blocking os.write, no writer thread
+                _write_stdin_direct(proc.stdin, task_bytes)
+            else:
+                workers.append(
+                    threading.Thread(target=_feed_stdin, args=(proc.stdin, task_bytes), daemon=True)
+                )
+        for worker in workers:
+            worker.start()
+        try:
+            proc.wait(timeout=timeout)
+        except BaseException:
+            # Timeout (or interrupt): take down the CLI and its children, and
+            # do not wait for EOF on pipes a surviving process may still hold
+            _kill_process_tree(proc.pid)
+            proc.kill()
+            proc.wait()
+            deadline = time.monotonic() + _POST_KILL_DRAIN
+            for worker in workers:
+                worker.join(max(0.0, deadline - time.monotonic()))
+            raise
+        for worker in workers:
+            worker.join()
+        if failures:
+            raise failures[0]
+        return subprocess.CompletedProcess(
+            cmd,
+            proc.returncode,
+            _decode_output(b"".join(stdout_chunks)),
+            _decode_output(b"".join(stderr_chunks)),
+        )
     
-    def _prepare_temp_dir(self, temp_dir: Path) -> None:
+    async def _run_subprocess_async(
+        self,
+        cmd: List[str],
+        task_content: str,
+        timeout: int,
+        env: Dict[str, str],
+        cwd: Optional[Path],
+    ) -> Tuple[int, str, str]:
+        """Run the CLI once via asyncio, feeding the task via stdin.
+        
+        Raises subprocess.TimeoutExpired on timeout so callers share the
+        synchronous error mapping.
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            cwd=str(cwd) if cwd else None,
+            creationflags=_CREATE_NO_WINDOW,
+            start_new_session=True,  # Own process group, see _kill_process_tree()
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(task_content.encode("utf-8")), timeout
+            )
+        except asyncio.TimeoutError:
+            raise subprocess.TimeoutExpired(cmd, timeout) from None
+        finally:
+            # Reap the child on timeout or cancellation. proc.wait() also waits
+            # for the pipes to close, which a process that escaped the group
+            # kill could hold off indefinitely, so it is bounded too.
+            if proc.returncode is None:
+                _kill_process_tree(proc.pid)
+                proc.kill()
+                try:
+                    await asyncio.wait_for(proc.wait(), _POST_KILL_DRAIN)
+                except asyncio.TimeoutError:
+                    # Drop the pipes now rather than when the loop is gone
+                    # (asyncio.subprocess.Process has no public close())
+                    proc._transport.close()
+        return proc.returncode, _decode_output(stdout), _decode_output(stderr)
+    
+    def _prepare_temp_dir(self, temp_dir: Path) -> Optional[int]:
         """Prepare temporary directory for CLIs that need it (file mode only).
         
         Copies agent prompt file to temp dir with the configured override filename.
+        Always a real copy, never a link: the temp dir is the CLI's working
+        directory, and writes to the placed file must not reach the user's prompt.
+        Only the contents are copied (the temp dir is throwaway).
+        
+        Returns:
+            The prompt's mtime_ns when it was placed, or None if nothing was placed.
         """
         # Copy agent prompt to temp dir if profile defines an override filename
         if self.profile.file_mode_override_name and self.agent_prompt_path:
             agents_md_path = temp_dir / self.profile.file_mode_override_name
-            shutil.copy2(self.agent_prompt_path, agents_md_path)
+            # Taken before placing the file, so a concurrent edit is caught next call
+            st = _stat_or_none(self.agent_prompt_path)
+            shutil.copyfile(self.agent_prompt_path, agents_md_path)
+            return st.st_mtime_ns if st else None
+        return None
     
     def _build_env(self, temp_dir: Optional[Path]) -> Dict[str, str]:
         """Build environment variables with placeholder substitution.
         
         Importantly, this injects the extended PATH per-subprocess call,
-        avoiding modification of the global os.environ.
-        """
-        env = os.environ.copy()
+        avoiding modification of the global os.environ. The base env is
+        precomputed in __init__; only {temp_dir}-dependent keys are rendered here.
         
-        # Inject extended PATH for CLI discovery (per-subprocess, not global)
-        env["PATH"] = build_extended_path()
-        
-        # Determine agent prompt path for placeholders
-        if self.mode == InputMode.DIRECTORY and self.agent_workspace:
-            # In directory mode, use the expected system file path
-            prompt_path = self.agent_workspace / self.profile.dir_mode_system_file
-        else:
-            prompt_path = self.agent_prompt_path or Path("")
-        
-        placeholders = {
-            "{agent_prompt_path}": str(prompt_path),
-            "{temp_dir}": str(temp_dir) if temp_dir else "",
-        }
+        When no key depends on {temp_dir} (e.g. Codex, Gemini) the shared base
+        dict itself is returned, so callers must treat the result as read-only.
+        """
+        if not self._env_temp_dir_templates:
+            return self._base_env
         
-        for key, value_template in self.profile.env_vars.items():
-            value = value_template
-            for placeholder, replacement in placeholders.items():
-                value = value.replace(placeholder, replacement)
-            env[key] = value
+        env = self._base_env.copy()
+        temp_dir_str = str(temp_dir) if temp_dir else ""
+        for key, value_template in self._env_temp_dir_templates.items():
+            env[key] = _render_template(value_template, temp_dir_str)
         
         return env
     
@@ -583,6 +2031,8 @@ class UniversalCLIAgent:
         temp_dir: Optional[Path],
         env: Optional[Dict[str, str]] = None,
         model: Optional[str] = None,
+        verify_version: bool = False,
+        template: Optional[List[_CompiledTemplate]] = None,
     ) -> List[str]:
         """Build the command with placeholder substitution.
         
@@ -590,38 +2040,37 @@ class UniversalCLIAgent:
             temp_dir: Temporary directory path for CLIs that need it.
             env: Environment dict (used for CLI resolution with extended PATH).
             model: Optional model name to add as -m flag.
+            verify_version: Whether to verify the CLI with --version while resolving.
+            template: Compiled template to build from (defaults to the call template).
             
         Note:
             Task prompt is passed via stdin in call(), not via command template.
         """
-        # Determine agent prompt path for placeholders
-        if self.mode == InputMode.DIRECTORY and self.agent_workspace:
-            prompt_path = self.agent_workspace / self.profile.dir_mode_system_file
-        else:
-            prompt_path = self.agent_prompt_path or Path("")
-        
-        placeholders = {
-            "{agent_prompt_path}": str(prompt_path),
-            "{temp_dir}": str(temp_dir) if temp_dir else "",
-        }
+        temp_dir_str = str(temp_dir) if temp_dir else ""
         
         # Get extended PATH for CLI resolution
         extended_path = env.get("PATH") if env else build_extended_path()
         
+        if template is None:
+            template = self._cmd_template_resolved
+        
         cmd = []
-        for i, part in enumerate(self.profile.command_template):
-            for placeholder, replacement in placeholders.items():
-                part = part.replace(placeholder, replacement)
+        for i, compiled in enumerate(template):
+            part = _render_template(compiled, temp_dir_str)
             
             # For the first element (CLI executable), resolve full path
             if i == 0:
-                cli_path = resolve_cli_executable(
-                    part,
-                    extended_path=extended_path,
-                    verify_version=True,
-                    env=env,
-                )
+                # Reuse this agent's earlier resolution unless asked to re-verify
+                cli_path = None if verify_version else self._resolved_cli.get(part)
+                if cli_path is None:
+                    cli_path = resolve_cli_executable(
+                        part,
+                        extended_path=extended_path,
+                        verify_version=verify_version,
+                        env=env,
+                    )
                 if cli_path:
+                    self._resolved_cli[part] = cli_path
                     part = cli_path
                 else:
                     # Raise early with helpful error message
@@ -637,3 +2086,72 @@ class UniversalCLIAgent:
         
         return cmd
 
+
+class CLIAgentPool:
+    """A fixed-size pool of pre-started agents for parallel task fan-out.
+    
+    Each worker owns one UniversalCLIAgent, so with the built-in profiles this
+    runs up to `size` tasks in parallel, one process per task. On construction
+    every agent is also started via start(): profiles with the EXPERIMENTAL
+    session mode pay CLI startup once per worker instead of once per task, and
+    a session that has exited is replaced when its worker next picks a task.
+    
+    Example:
+        >>> with CLIAgentPool(GEMINI_PROFILE, "worker", "./prompts/worker.md", size=4) as pool:
+        ...     futures = [pool.submit(task) for task in tasks]
+        ...     results = [f.result() for f in futures]
+    """
+    
+    def __init__(
+        self,
+        profile: CLIProfile,
+        agent_name: str,
+        path: Union[str, Path],
+        size: int = 4,
+        model: Optional[str] = None,
+    ):
+        """Create the agents and start their sessions.
+        
+        Args:
+            profile: The CLI profile configuration to use.
+            agent_name: Base name for the workers (suffixed with the worker index).
+            path: Path to either a system prompt file or workspace directory.
+            size: Number of workers (maximum tasks running at once).
+            model: Optional model name for every worker.
+        """
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}")
+        self.profile = profile
+        self._idle: "queue.Queue[UniversalCLIAgent]" = queue.Queue()
+        self._agents: List[UniversalCLIAgent] = []
+        for i in range(size):
+            agent = UniversalCLIAgent.from_path(profile, f"{agent_name}-{i}", path, model=model)
+            agent.start()
+            self._agents.append(agent)
+            self._idle.put(agent)
+        self._executor = ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix=f"cli_agent_{profile.name}"
+        )
+    
+    def submit(self, task_content: str, timeout: int = 300) -> "Future[AgentResult]":
+        """Queue a task; the returned Future resolves to its AgentResult."""
+        return self._executor.submit(self._run, task_content, timeout)
+    
+    def _run(self, task_content: str, timeout: int) -> AgentResult:
+        agent = self._idle.get()
+        try:
+            return agent.call(task_content, timeout=timeout)
+        finally:
+            self._idle.put(agent)
+    
+    def close(self) -> None:
+        """Wait for queued tasks, then close every worker (sessions and temp dirs)."""
+        self._executor.shutdown(wait=True)
+        for agent in self._agents:
+            agent.close()
+    
+    def __enter__(self) -> "CLIAgentPool":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -14,10 +14,20 @@ Supported CLIs:
 
 from __future__ import annotations
 
+import io
 import json
-from typing import Any, Dict, List
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-from .core import AgentResult, CLIProfile
+from .core import AgentResult, CLIProfile, UniversalCLIAgent, _absolute_path, _decode_output
+
+# orjson is an optional speed-up for the output parsers; its JSONDecodeError
+# subclasses json.JSONDecodeError, so the except clauses work either way.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 
 def parse_gemini_json(stdout: str, stderr: str, returncode: int) -> AgentResult:
@@ -50,7 +60,7 @@ def parse_gemini_json(stdout: str, stderr: str, returncode: int) -> AgentResult:
     
     stdout = stdout or "{}"
     try:
-        data = json.loads(stdout)
+        data = _json_loads(stdout)
     except json.JSONDecodeError as e:
         return AgentResult(
             ok=False,
@@ -96,40 +106,49 @@ def _normalize_gemini_stats(raw_stats: Dict[str, Any]) -> Dict[str, Any]:
     
     Also preserves per-model breakdown in 'per_model' for cost estimation.
     """
-    stats: Dict[str, Any] = {
-        "input_tokens": 0,
-        "output_tokens": 0,
-        "total_tokens": 0,
-        "cached_tokens": 0,
-        "thoughts_tokens": 0,
-        "tool_tokens": 0,
-        "per_model": {},  # Per-model breakdown for cost estimation
-        "raw": raw_stats,
-    }
+    input_tokens = output_tokens = total_tokens = 0
+    cached_tokens = thoughts_tokens = tool_tokens = 0
+    per_model: Dict[str, Dict[str, int]] = {}  # Per-model breakdown for cost estimation
     
+    # Single pass: each count is read once and summed in locals
     models = raw_stats.get("models", {})
     for model_name, model_data in models.items():
         tokens = model_data.get("tokens", {})
+        prompt = tokens.get("prompt", 0)
+        candidates = tokens.get("candidates", 0)
+        total = tokens.get("total", 0)
+        cached = tokens.get("cached", 0)
+        thoughts = tokens.get("thoughts", 0)
+        tool = tokens.get("tool", 0)
         
         # Aggregate totals
-        stats["input_tokens"] += tokens.get("prompt", 0)
-        stats["output_tokens"] += tokens.get("candidates", 0)
-        stats["total_tokens"] += tokens.get("total", 0)
-        stats["cached_tokens"] += tokens.get("cached", 0)
-        stats["thoughts_tokens"] += tokens.get("thoughts", 0)
-        stats["tool_tokens"] += tokens.get("tool", 0)
+        input_tokens += prompt
+        output_tokens += candidates
+        total_tokens += total
+        cached_tokens += cached
+        thoughts_tokens += thoughts
+        tool_tokens += tool
         
         # Store per-model breakdown
-        stats["per_model"][model_name] = {
-            "input_tokens": tokens.get("prompt", 0),
-            "output_tokens": tokens.get("candidates", 0),
-            "total_tokens": tokens.get("total", 0),
-            "cached_tokens": tokens.get("cached", 0),
-            "thoughts_tokens": tokens.get("thoughts", 0),
-            "tool_tokens": tokens.get("tool", 0),
+        per_model[model_name] = {
+            "input_tokens": prompt,
+            "output_tokens": candidates,
+            "total_tokens": total,
+            "cached_tokens": cached,
+            "thoughts_tokens": thoughts,
+            "tool_tokens": tool,
         }
     
-    return stats
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": total_tokens,
+        "cached_tokens": cached_tokens,
+        "thoughts_tokens": thoughts_tokens,
+        "tool_tokens": tool_tokens,
+        "per_model": per_model,
+        "raw": raw_stats,
+    }
 
 
 def parse_codex_ndjson(stdout: str, stderr: str, returncode: int) -> AgentResult:
@@ -144,78 +163,133 @@ def parse_codex_ndjson(stdout: str, stderr: str, returncode: int) -> AgentResult
     We extract:
     - Content from the last "item.completed" where item.type="agent_message"
     - Stats from "turn.completed" usage
+    
+    Buffered wrapper around CodexStreamParser for already-captured output.
     """
-    if returncode != 0:
-        return AgentResult(
-            ok=False,
-            content="",
-            error={
-                "type": "cli_error",
-                "message": stderr or f"CLI exited with code {returncode}",
-                "returncode": returncode,
-                "raw_output": stdout[:1000] if stdout else None,
-            },
-        )
+    parser = CodexStreamParser()
+    if returncode == 0:
+        for line in io.StringIO(stdout or ""):
+            parser.feed(line)
+    elif stdout:
+        # Only the head is reported on failure; skip parsing the events
+        parser.feed(stdout[:_RAW_OUTPUT_LIMIT])
+    return parser.result(stderr, returncode)
+
+
+# Characters of stdout echoed back in cli_error results
+_RAW_OUTPUT_LIMIT = 1000
+
+
+class CodexStreamParser:
+    """Incremental parser for Codex NDJSON, fed one stdout line at a time.
     
-    content_parts: List[str] = []
-    usage: Dict[str, Any] = {}
-    errors: List[Dict] = []
+    Lines may be str or raw bytes straight from the pipe; bytes are handed
+    to the JSON decoder as-is, so the stream is never decoded as a whole.
     
+    Keeps only the agent messages, the latest usage, error events, and the
+    first _RAW_OUTPUT_LIMIT characters of raw output (for cli_error reports),
+    so memory does not grow with the length of the event stream. Used as
+    CODEX_PROFILE.stream_parser; parse_codex_ndjson() wraps it for strings.
+    """
     
-    stdout = stdout or ""
-    stderr = stderr or ""
+    def __init__(self) -> None:
+        self.content_parts: List[str] = []
+        self.usage: Dict[str, Any] = {}
+        self.errors: List[Dict] = []
+        self._head: List[str] = []
+        self._head_len = 0
     
-    for line in stdout.strip().split("\n"):
-        if not line.strip():
-            continue
+    def feed(self, line: Union[str, bytes]) -> None:
+        """Consume one line of Codex stdout."""
+        is_bytes = isinstance(line, bytes)
+        if self._head_len < _RAW_OUTPUT_LIMIT:
+            text = _decode_output(line) if is_bytes else line
+            self._head.append(text)
+            self._head_len += len(text)
         
+        # Events are JSON objects; skip blank lines and debug output cheaply.
+        # lstrip() returns the line itself unless it has leading whitespace,
+        # and the JSON decoder tolerates the trailing newline, so no copy is made.
+        line = line.lstrip()
+        if not line.startswith(b"{" if is_bytes else "{"):
+            return
         try:
-            event = json.loads(line)
-        except json.JSONDecodeError:
-            # Skip non-JSON lines (e.g., debug output)
-            continue
-        
-        event_type = event.get("type", "")
+            event = _json_loads(line)
+        except ValueError:
+            if not is_bytes:
+                # Skip non-JSON lines (e.g., debug output)
+                return
+            # Invalid UTF-8 inside an event: retry with replacement characters
+            try:
+                event = _json_loads(_decode_output(line))
+            except ValueError:
+                return
         
+        handler = _CODEX_HANDLERS.get(event.get("type"))
+        if handler is not None:
+            handler(self, event)
+    
+    def _on_item_completed(self, event: Dict[str, Any]) -> None:
         # Collect agent messages
-        if event_type == "item.completed":
-            item = event.get("item", {})
-            if item.get("type") == "agent_message":
-                text = item.get("text", "")
-                if text:
-                    content_parts.append(text)
-        
+        item = event.get("item", {})
+        if item.get("type") == "agent_message":
+            text = item.get("text", "")
+            if text:
+                self.content_parts.append(text)
+    
+    def _on_turn_completed(self, event: Dict[str, Any]) -> None:
         # Collect usage from turn completion
-        elif event_type == "turn.completed":
-            usage = event.get("usage", {})
-        
-        # Collect errors
-        elif event_type == "error":
-            errors.append(event)
+        self.usage = event.get("usage", {})
+    
+    def _on_error(self, event: Dict[str, Any]) -> None:
+        self.errors.append(event)
     
-    # Check for errors
-    if errors:
+    def result(self, stderr: str, returncode: int) -> AgentResult:
+        """Build the AgentResult once the CLI has exited."""
+        if returncode != 0:
+            raw_output = "".join(self._head)[:_RAW_OUTPUT_LIMIT]
+            return AgentResult(
+                ok=False,
+                content="",
+                error={
+                    "type": "cli_error",
+                    "message": stderr or f"CLI exited with code {returncode}",
+                    "returncode": returncode,
+                    "raw_output": raw_output or None,
+                },
+            )
+        
+        # Check for errors
+        if self.errors:
+            return AgentResult(
+                ok=False,
+                content="",
+                error={
+                    "type": "agent_error",
+                    "message": self.errors[0].get("message", "Unknown error"),
+                    "errors": self.errors,
+                },
+            )
+        
+        # Combine all content parts
+        content = "\n\n".join(self.content_parts)
+        
+        # Normalize stats
+        stats = _normalize_codex_stats(self.usage)
+        
         return AgentResult(
-            ok=False,
-            content="",
-            error={
-                "type": "agent_error",
-                "message": errors[0].get("message", "Unknown error"),
-                "errors": errors,
-            },
+            ok=True,
+            content=content,
+            stats=stats,
         )
-    
-    # Combine all content parts
-    content = "\n\n".join(content_parts)
-    
-    # Normalize stats
-    stats = _normalize_codex_stats(usage)
-    
-    return AgentResult(
-        ok=True,
-        content=content,
-        stats=stats,
-    )
+
+
+# Codex event type -> CodexStreamParser handler; other event types are ignored
+_CODEX_HANDLERS: Dict[str, Callable[[CodexStreamParser, Dict[str, Any]], None]] = {
+    "item.completed": CodexStreamParser._on_item_completed,
+    "turn.completed": CodexStreamParser._on_turn_completed,
+    "error": CodexStreamParser._on_error,
+}
 
 
 def _normalize_codex_stats(usage: Dict[str, Any]) -> Dict[str, Any]:
@@ -239,6 +313,59 @@ def _normalize_codex_stats(usage: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+# =============================================================================
+# In-process Backends
+# =============================================================================
+
+# Default model for call_gemini_sdk when neither agent nor call specifies one
+GEMINI_SDK_DEFAULT_MODEL = "gemini-2.5-flash"
+
+_gemini_client: Any = None
+
+
+def call_gemini_sdk(task_content: str, system_prompt_path: Path, model: Optional[str]) -> AgentResult:
+    """In-process Gemini backend using the google-genai SDK (optional dependency).
+    
+    Intended as CLIProfile.inprocess_callable to skip the Gemini CLI subprocess:
+    
+        GEMINI_SDK_PROFILE = dataclasses.replace(
+            GEMINI_PROFILE, name="gemini_sdk", inprocess_callable=call_gemini_sdk
+        )
+    
+    Authentication follows the SDK (GEMINI_API_KEY / GOOGLE_API_KEY or Vertex AI
+    env vars). Stats are normalized to the same shape as parse_gemini_json.
+    """
+    global _gemini_client
+    from google import genai
+    from google.genai import types
+    
+    if _gemini_client is None:
+        _gemini_client = genai.Client()
+    
+    model = model or GEMINI_SDK_DEFAULT_MODEL
+    system_instruction = system_prompt_path.read_text(encoding="utf-8")
+    response = _gemini_client.models.generate_content(
+        model=model,
+        contents=task_content,
+        config=types.GenerateContentConfig(system_instruction=system_instruction),
+    )
+    
+    usage = response.usage_metadata
+    tokens = {
+        "prompt": getattr(usage, "prompt_token_count", None) or 0,
+        "candidates": getattr(usage, "candidates_token_count", None) or 0,
+        "total": getattr(usage, "total_token_count", None) or 0,
+        "cached": getattr(usage, "cached_content_token_count", None) or 0,
+        "thoughts": getattr(usage, "thoughts_token_count", None) or 0,
+        "tool": getattr(usage, "tool_use_prompt_token_count", None) or 0,
+    }
+    return AgentResult(
+        ok=True,
+        content=response.text or "",
+        stats=_normalize_gemini_stats({"models": {model: {"tokens": tokens}}}),
+    )
+
+
 # =============================================================================
 # Predefined CLI Profiles
 # =============================================================================
@@ -281,6 +408,7 @@ CODEX_PROFILE = CLIProfile(
         # Empty - do not override CODEX_HOME to preserve auth.json access
     },
     output_parser=parse_codex_ndjson,
+    stream_parser=CodexStreamParser,
     requires_temp_dir=True,  # Only needed in file mode
     file_mode_override_name="AGENTS.override.md",  # Completely override system prompt
     dir_mode_system_file="AGENTS.md",  # Or user-placed AGENTS.override.md
@@ -306,7 +434,61 @@ def get_profile(name: str) -> CLIProfile:
     Raises:
         KeyError: If the profile name is not found.
     """
-    if name not in PROFILES:
+    try:
+        return PROFILES[name]
+    except KeyError:
         available = ", ".join(PROFILES.keys())
-        raise KeyError(f"Unknown profile '{name}'. Available: {available}")
-    return PROFILES[name]
+        raise KeyError(f"Unknown profile '{name}'. Available: {available}") from None
+
+
+def get_agent(
+    profile_name: str,
+    agent_name: str,
+    path: Union[str, Path],
+    model: Optional[str] = None,
+) -> UniversalCLIAgent:
+    """Get a process-wide shared agent, constructing it on first use.
+    
+    Agents are keyed by (profile name, agent name, absolute path, model), so
+    long-running workers reuse the precomputed env, templates and resolved
+    CLI instead of rebuilding them. Construction is serialized, so concurrent
+    first calls get the same instance; failures are not cached. Shared agents
+    are never evicted; close_agents() releases them.
+    
+    Args:
+        profile_name: Name of a profile registered in PROFILES.
+        agent_name: Agent name (used for logging).
+        path: Agent prompt file or workspace directory (see from_path()).
+        model: Optional model name.
+        
+    Raises:
+        KeyError: If the profile name is not found.
+        FileNotFoundError: If the path does not exist.
+    """
+    key = (profile_name, agent_name, str(_absolute_path(path)), model)
+    with _SHARED_AGENTS_LOCK:
+        agent = _SHARED_AGENTS.get(key)
+        if agent is None:
+            agent = UniversalCLIAgent.from_path(
+                get_profile(profile_name), agent_name, key[2], model=model
+            )
+            _SHARED_AGENTS[key] = agent
+    return agent
+
+
+def close_agents() -> None:
+    """Close every agent returned by get_agent() and forget them.
+    
+    Stops their sessions and removes their temp dirs; later get_agent()
+    calls construct fresh agents.
+    """
+    with _SHARED_AGENTS_LOCK:
+        agents = list(_SHARED_AGENTS.values())
+        _SHARED_AGENTS.clear()
+    for agent in agents:
+        agent.close()
+
+
+# get_agent() registry: (profile name, agent name, absolute path, model) -> agent
+_SHARED_AGENTS: Dict[Tuple[str, str, str, Optional[str]], UniversalCLIAgent] = {}
+_SHARED_AGENTS_LOCK = threading.Lock()
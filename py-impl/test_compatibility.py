@@ -9,8 +9,11 @@ cli_subagent 兼容性测试 - 验证 Gemini CLI 和 Codex CLI 更新后功能
 运行方式: uv run python test_compatibility.py
 """
 
+import asyncio
+import dataclasses
 import json
 import os
+import shutil
 import subprocess
 import sys
 import tempfile
@@ -29,9 +32,17 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from cli_subagent.core import (
     AgentResult,
+    CLIAgentPool,
     CLIProfile,
     InputMode,
+    ResultCache,
     UniversalCLIAgent,
+    _LIVE_TEMP_DIRS,
+    _compile_template,
+    _filter_existing,
+    _render_template,
+    _which,
+    _windows_pathext,
     build_candidate_paths,
     build_extended_path,
     resolve_cli_executable,
@@ -40,6 +51,9 @@ from cli_subagent.profiles import (
     CODEX_PROFILE,
     GEMINI_PROFILE,
     PROFILES,
+    CodexStreamParser,
+    close_agents,
+    get_agent,
     get_profile,
     parse_codex_ndjson,
     parse_gemini_json,
@@ -457,6 +471,512 @@ class TestLayer5_Profiles(unittest.TestCase):
         self.assertEqual(len(PROFILES), 2)
         print(f"  [OK] PROFILES: {list(PROFILES.keys())}")
 
+    def test_5_5_get_agent_shared(self):
+        """5.5 get_agent() 并发首次调用返回同一实例，close_agents() 释放"""
+        from concurrent.futures import ThreadPoolExecutor
+        tmp = Path(tempfile.mkdtemp(prefix="cli_subagent_test_"))
+        try:
+            prompt = tmp / "agent.md"
+            prompt.write_text("PERSONA", encoding="utf-8")
+            with ThreadPoolExecutor(8) as executor:
+                agents = list(executor.map(
+                    lambda _: get_agent("gemini", "shared", prompt), range(16)
+                ))
+            self.assertEqual(len({id(a) for a in agents}), 1)
+            self.assertIs(get_agent("gemini", "shared", str(prompt)), agents[0])
+            self.assertIsNot(get_agent("gemini", "shared", prompt, model="m"), agents[0])
+            close_agents()
+            self.assertIsNot(get_agent("gemini", "shared", prompt), agents[0])
+            close_agents()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        print("  [OK] One shared agent per key")
+
+
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  第六层：离线单元验证（解析器、缓存、路径查找、模板）              ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+_CODEX_EVENTS = [
+    b'{"type":"thread.started","thread_id":"t"}',
+    b"debug noise line",
+    b'{"type":"item.completed","item":{"type":"reasoning","text":"skip"}}',
+    b'{"type":"item.completed","item":{"type":"agent_message","text":"first"}}',
+    b"{not json",
+    b'{"type":"item.completed","item":{"type":"agent_message","text":"caf\xc3\xa9"}}',
+    b'{"type":"turn.completed","usage":{"input_tokens":10,"output_tokens":5,"cached_input_tokens":2}}',
+]
+
+
+class TestLayer6_Offline(unittest.TestCase):
+    """Layer 6: Parsers, result cache, PATH lookup and templates (no CLI needed)."""
+
+    def _feed_bytes(self, data: bytes, returncode: int = 0) -> AgentResult:
+        parser = CodexStreamParser()
+        for line in data.splitlines(keepends=True):
+            parser.feed(line)
+        return parser.result("", returncode)
+
+    def test_6_1_codex_stream_parser_bytes(self):
+        """6.1 CodexStreamParser 逐行解析 bytes，与 parse_codex_ndjson 结果一致"""
+        data = b"\n".join(_CODEX_EVENTS) + b"\n"
+        r = self._feed_bytes(data)
+        self.assertTrue(r.ok, r.error)
+        self.assertEqual(r.content, "first\n\ncafé")
+        self.assertEqual((r.input_tokens, r.output_tokens, r.cached_tokens), (10, 5, 2))
+        self.assertEqual(r, parse_codex_ndjson(data.decode("utf-8"), "", 0))
+        print(f"  [OK] Stream parser content: {r.content!r}")
+
+    def test_6_2_codex_invalid_utf8(self):
+        """6.2 事件内含非法 UTF-8 时以替换字符保留内容"""
+        data = b'{"type":"item.completed","item":{"type":"agent_message","text":"bad\xff"}}\n'
+        r = self._feed_bytes(data)
+        self.assertEqual(r.content, "bad\ufffd")
+        self.assertEqual(r, parse_codex_ndjson(data.decode("utf-8", "replace"), "", 0))
+        print("  [OK] Invalid UTF-8 replaced")
+
+    def test_6_3_codex_failure_head(self):
+        """6.3 非零退出码：cli_error 只保留输出开头 1000 字符"""
+        data = b"x" * 600 + b"\n" + b"y" * 600 + b"\n" + b"z" * 600 + b"\n"
+        r = self._feed_bytes(data, returncode=2)
+        self.assertFalse(r.ok)
+        self.assertEqual(r.error["type"], "cli_error")
+        self.assertEqual(r.error["returncode"], 2)
+        self.assertEqual(r.error["raw_output"], data.decode()[:1000])
+        self.assertEqual(r.error, parse_codex_ndjson(data.decode(), "", 2).error)
+        print("  [OK] Failure head truncated to 1000 chars")
+
+    def test_6_4_gemini_per_model(self):
+        """6.4 parse_gemini_json 汇总多模型 token"""
+        stdout = json.dumps({"response": "hi", "stats": {"models": {
+            "a": {"tokens": {"prompt": 1, "candidates": 2, "total": 3, "cached": 1}},
+            "b": {"tokens": {"prompt": 10, "candidates": 20, "total": 30, "thoughts": 4}},
+        }}})
+        r = parse_gemini_json(stdout, "", 0)
+        self.assertTrue(r.ok)
+        self.assertEqual((r.input_tokens, r.output_tokens, r.total_tokens), (11, 22, 33))
+        self.assertEqual((r.cached_tokens, r.thoughts_tokens), (1, 4))
+        self.assertEqual(r.per_model["b"]["output_tokens"], 20)
+        self.assertFalse(parse_gemini_json("{oops", "", 0).ok)
+        print(f"  [OK] Gemini stats: {r.total_tokens} tokens over {len(r.per_model)} models")
+
+    def test_6_5_result_cache_memory(self):
+        """6.5 ResultCache：返回独立副本、不缓存失败、LRU 淘汰"""
+        cache = ResultCache(maxsize=2)
+        result = AgentResult(ok=True, content="c", stats={"input_tokens": 1})
+        cache.put("k1", result)
+        result.stats["input_tokens"] = 999
+        hit = cache.get("k1")
+        self.assertEqual(hit.input_tokens, 1)
+        hit.stats["input_tokens"] = 7
+        self.assertEqual(cache.get("k1").input_tokens, 1)
+
+        cache.put("bad", AgentResult(ok=False, content="", error={"type": "timeout"}))
+        self.assertIsNone(cache.get("bad"))
+
+        cache.put("k2", AgentResult(ok=True, content="2"))
+        cache.get("k1")  # k1 is now most recently used
+        cache.put("k3", AgentResult(ok=True, content="3"))
+        self.assertIsNone(cache.get("k2"))
+        self.assertEqual(cache.get("k1").content, "c")
+
+        cache.put("obj", AgentResult(ok=True, content="o", stats={"raw": object()}))
+        self.assertIsNone(cache.get("obj"))
+
+        self.assertNotEqual(ResultCache.make_key("ab", "c"), ResultCache.make_key("a", "bc"))
+        print("  [OK] ResultCache copies, skips failures, evicts LRU")
+
+    def test_6_6_result_cache_sqlite(self):
+        """6.6 ResultCache SQLite 层跨实例持久化"""
+        tmp = tempfile.mkdtemp(prefix="cli_subagent_test_")
+        try:
+            db = Path(tmp) / "sub" / "results.db"
+            cache = ResultCache(path=db)
+            cache.put("k", AgentResult(ok=True, content="persisted", stats={"total_tokens": 3}))
+            cache.close()
+            reopened = ResultCache(path=db)
+            hit = reopened.get("k")
+            self.assertEqual((hit.content, hit.total_tokens), ("persisted", 3))
+            reopened.clear()
+            self.assertIsNone(reopened.get("k"))
+            reopened.close()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        print("  [OK] SQLite tier survives reopen")
+
+    @unittest.skipIf(os.name == "nt", "POSIX executable bits")
+    def test_6_7_which(self):
+        """6.7 _which 按 PATH 顺序查找，跳过不可执行文件"""
+        tmp = Path(tempfile.mkdtemp(prefix="cli_subagent_test_"))
+        try:
+            first, second = tmp / "first", tmp / "second"
+            first.mkdir()
+            second.mkdir()
+            (first / "fakecli").write_text("not executable")
+            for d in (first, second):
+                exe = d / "fakecli2"
+                exe.write_text("#!/bin/sh\n")
+                exe.chmod(0o755)
+            (second / "fakecli").write_text("#!/bin/sh\n")
+            (second / "fakecli").chmod(0o755)
+            path = os.pathsep.join([str(first), str(second)])
+            self.assertEqual(_which("fakecli", path), str(second / "fakecli"))
+            self.assertEqual(_which("fakecli2", path), str(first / "fakecli2"))
+            self.assertIsNone(_which("missing-cli", path))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        print("  [OK] _which honors PATH order and executable bits")
+
+    def test_6_8_windows_pathext(self):
+        """6.8 PATHEXT 解析：大写化并补齐 .CMD 等扩展名"""
+        exts = _windows_pathext(".exe;.Cmd".replace(";", os.pathsep))
+        self.assertEqual(exts[:2], (".EXE", ".CMD"))
+        self.assertIn(".BAT", exts)
+        self.assertEqual(len(exts), len(set(exts)))
+        self.assertIn(".CMD", _windows_pathext(""))
+        print(f"  [OK] PATHEXT: {exts}")
+
+    def test_6_9_filter_existing(self):
+        """6.9 _filter_existing 保序过滤，跳过缺失的父目录"""
+        tmp = Path(tempfile.mkdtemp(prefix="cli_subagent_test_"))
+        try:
+            (tmp / "a").mkdir()
+            (tmp / "a" / "bin").mkdir()
+            (tmp / "b").mkdir()
+            candidates = [
+                str(tmp / "b"),
+                str(tmp / "missing" / "deeper" / "bin"),
+                str(tmp / "a" / "bin"),
+                str(tmp / "a" / "nope"),
+                str(tmp / "a"),
+            ]
+            self.assertEqual(
+                _filter_existing(candidates),
+                [str(tmp / "b"), str(tmp / "a" / "bin"), str(tmp / "a")],
+            )
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        print("  [OK] _filter_existing keeps order, drops missing")
+
+    def test_6_10_compile_template(self):
+        """6.10 _compile_template 预先替换 prompt 路径，{temp_dir} 留到调用时"""
+        self.assertEqual(_compile_template("--json", "/p.md"), "--json")
+        self.assertEqual(_compile_template("{agent_prompt_path}", "/p.md"), "/p.md")
+        compiled = _compile_template("{temp_dir}/x:{agent_prompt_path}", "/p.md")
+        self.assertEqual(_render_template(compiled, "/tmp/t"), "/tmp/t/x:/p.md")
+        # A prompt path containing a placeholder is not expanded again
+        tricky = _compile_template("{agent_prompt_path}", "/{temp_dir}.md")
+        self.assertEqual(_render_template(tricky, "/tmp/t"), "/{temp_dir}.md")
+        print("  [OK] Templates compiled once, rendered per call")
+
+
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  第七层：伪造 CLI 端到端（call/acall、超时、临时目录复用）          ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+# Minimal stand-in for `codex exec --json`: echoes the task and AGENTS file
+_FAKE_CODEX = """\
+import json, os, subprocess, sys, time
+if "--version" in sys.argv:
+    print("codex 0.0.0-test")
+    sys.exit(0)
+task = sys.stdin.read()
+if task.startswith("SPAWN"):
+    # A tool process that inherits (and holds open) stdout/stderr
+    subprocess.Popen([sys.executable, "-c", "import time; time.sleep(20)"])
+if task.startswith(("SLEEP", "SPAWN")):
+    time.sleep(10)
+agents = ""
+for name in ("AGENTS.override.md", "AGENTS.md"):
+    if os.path.exists(name):
+        with open(name) as fh:
+            agents = fh.read()
+        break
+if task.startswith("TAMPER"):
+    with open("AGENTS.override.md", "a") as fh:
+        fh.write("INJECTED")
+log = os.environ.get("FAKE_CLI_LOG")
+if log:
+    with open(log, "a") as fh:
+        fh.write("call\\n")
+text = "len=%d|cwd=%s|agents=%s" % (len(task), os.getcwd(), agents)
+print(json.dumps({"type": "item.completed", "item": {"type": "agent_message", "text": text}}))
+print(json.dumps({"type": "turn.completed", "usage": {"input_tokens": 10, "output_tokens": 5}}))
+"""
+
+
+def _write_fake_cli(directory: Path, name: str, source: str) -> Path:
+    """Write an executable Python script run by the current interpreter."""
+    exe = directory / name
+    exe.write_text(f"#!{sys.executable}\n{source}", encoding="utf-8")
+    exe.chmod(0o755)
+    return exe
+
+
+def _fake_codex_profile(exe: Path) -> CLIProfile:
+    return dataclasses.replace(
+        CODEX_PROFILE, name="fake_codex",
+        command_template=[str(exe)] + CODEX_PROFILE.command_template[1:],
+    )
+
+
+@unittest.skipIf(os.name == "nt", "fake CLI relies on a #! script")
+class TestLayer7_FakeCLI(unittest.TestCase):
+    """Layer 7: End-to-end behaviour against a fake CLI (no network)."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = Path(tempfile.mkdtemp(prefix="cli_subagent_test_"))
+        cls.profile = _fake_codex_profile(_write_fake_cli(cls.tmp, "fake-codex", _FAKE_CODEX))
+        cls.prompt = cls.tmp / "agent.md"
+        cls.prompt.write_text("PERSONA", encoding="utf-8")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def setUp(self):
+        self.agent = UniversalCLIAgent.from_file(self.profile, "fake", self.prompt)
+
+    def tearDown(self):
+        self.agent.close()
+
+    def _field(self, result: AgentResult, name: str) -> str:
+        return dict(part.split("=", 1) for part in result.content.split("|"))[name]
+
+    def test_7_1_call_reuses_temp_dir(self):
+        """7.1 call() 复用同一临时目录，close() 后删除"""
+        r1 = self.agent.call("one")
+        r2 = self.agent.call("two")
+        self.assertTrue(r1.ok and r2.ok, (r1.error, r2.error))
+        self.assertEqual(self._field(r1, "agents"), "PERSONA")
+        self.assertEqual((r1.input_tokens, r1.output_tokens), (10, 5))
+        work_dir = Path(self._field(r1, "cwd"))
+        self.assertEqual(self._field(r2, "cwd"), str(work_dir))
+        self.assertIn(work_dir, _LIVE_TEMP_DIRS)  # Removed at exit if never closed
+        self.agent.close()
+        self.assertFalse(work_dir.exists())
+        self.assertNotIn(work_dir, _LIVE_TEMP_DIRS)
+        print(f"  [OK] Temp dir reused: {work_dir.name}")
+
+    def test_7_2_placed_prompt_isolated(self):
+        """7.2 CLI 改写 AGENTS.override.md 不影响原文件，下次调用重新放置"""
+        self.assertTrue(self.agent.call("TAMPER").ok)
+        self.assertEqual(self.prompt.read_text(encoding="utf-8"), "PERSONA")
+        self.assertEqual(self._field(self.agent.call("next"), "agents"), "PERSONA")
+        print("  [OK] Placed prompt restored after CLI write")
+
+    def test_7_3_call_timeout(self):
+        """7.3 call() 超时返回 timeout 错误"""
+        start = time.monotonic()
+        r = self.agent.call("SLEEP", timeout=1)
+        self.assertFalse(r.ok)
+        self.assertEqual(r.error["type"], "timeout")
+        self.assertLess(time.monotonic() - start, 8)
+        print(f"  [OK] Timeout error: {r.error['message']}")
+
+    def test_7_4_acall(self):
+        """7.4 acall() 成功与超时"""
+        async def run():
+            return await asyncio.gather(
+                self.agent.acall("async"), self.agent.acall("SLEEP", timeout=1)
+            )
+        ok, timed_out = asyncio.run(run())
+        self.assertTrue(ok.ok, ok.error)
+        self.assertEqual(self._field(ok, "agents"), "PERSONA")
+        self.assertEqual(timed_out.error["type"], "timeout")
+        print("  [OK] acall() result and timeout")
+
+    def test_7_5_large_task_stdin(self):
+        """7.5 大任务（>64 KiB）完整经 stdin 传入"""
+        task = "x" * (256 * 1024)
+        r = self.agent.call(task)
+        self.assertTrue(r.ok, r.error)
+        self.assertEqual(self._field(r, "len"), str(len(task)))
+        print(f"  [OK] {len(task)} byte task delivered")
+
+    def test_7_6_result_cache(self):
+        """7.6 ResultCache 命中时不再启动 CLI"""
+        log = self.tmp / "calls.log"
+        os.environ["FAKE_CLI_LOG"] = str(log)
+        try:
+            agent = UniversalCLIAgent.from_file(
+                self.profile, "cached", self.prompt, cache=ResultCache()
+            )
+            with agent:
+                first, second = agent.call("same"), agent.call("same")
+        finally:
+            del os.environ["FAKE_CLI_LOG"]
+        self.assertEqual(first, second)
+        self.assertEqual(log.read_text().count("call"), 1)
+
+        # Same prompt, task and cache, different workspaces: no shared entry
+        cache = ResultCache()
+        results = []
+        for name in ("repo_a", "repo_b"):
+            workspace = self.tmp / name
+            workspace.mkdir()
+            (workspace / "AGENTS.md").write_text("PERSONA", encoding="utf-8")
+            with UniversalCLIAgent.from_directory(
+                self.profile, name, workspace, cache=cache
+            ) as agent:
+                results.append(agent.call("same"))
+        self.assertEqual(
+            [self._field(r, "cwd") for r in results],
+            [str(self.tmp / "repo_a"), str(self.tmp / "repo_b")],
+        )
+        print("  [OK] Second identical call served from cache, keyed per workspace")
+
+    def test_7_7_timeout_kills_children(self):
+        """7.7 超时连同 CLI 的子进程一起终止，不等待其持有的管道"""
+        start = time.monotonic()
+        r = self.agent.call("SPAWN", timeout=1)
+        self.assertEqual(r.error["type"], "timeout")
+        self.assertLess(time.monotonic() - start, 5)
+        start = time.monotonic()
+        r = asyncio.run(self.agent.acall("SPAWN", timeout=1))
+        self.assertEqual(r.error["type"], "timeout")
+        self.assertLess(time.monotonic() - start, 5)
+        print(f"  [OK] Timed out in {time.monotonic() - start:.1f}s despite child process")
+
+
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  第八层：实验性会话模式（伪造 REPL CLI）                          ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+_SESSION_DELIMITER = "<<<END>>>"
+
+# Speaks the experimental delimiter protocol; with --once, answers a single
+# stdin task like a one-shot CLI
+_FAKE_REPL = """\
+import json, os, sys, time
+DELIM = "<<<END>>>"
+
+def answer(task, turn):
+    if task == "DIE":
+        sys.exit(3)
+    if task == "HANG":
+        time.sleep(10)
+    if task.startswith("SLOW"):
+        time.sleep(0.5)
+    if task == "BADBYTE":
+        sys.stdout.flush()
+        sys.stdout.buffer.write(b'{"response": "bad\\xff", "stats": {}}\\n')
+    text = "%s:%s:pid%d" % (turn, task, os.getpid())
+    print(json.dumps({"response": text, "stats": {}}), flush=True)
+
+if "--once" in sys.argv:
+    answer(sys.stdin.read(), "once")
+    sys.exit(0)
+buf, turn = [], 0
+for line in sys.stdin:
+    if line.rstrip("\\n") != DELIM:
+        buf.append(line)
+        continue
+    turn += 1
+    answer("".join(buf).rstrip("\\n"), "turn%d" % turn)
+    buf = []
+    print(DELIM, flush=True)
+"""
+
+
+@unittest.skipIf(os.name == "nt", "fake CLI relies on a #! script")
+class TestLayer8_Sessions(unittest.TestCase):
+    """Layer 8: Experimental session mode against a fake REPL CLI."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = Path(tempfile.mkdtemp(prefix="cli_subagent_test_"))
+        repl = _write_fake_cli(cls.tmp, "fake-repl", _FAKE_REPL)
+        cls.profile = CLIProfile(
+            name="fake_repl",
+            command_template=[str(repl), "--once"],
+            env_vars={"GEMINI_SYSTEM_MD": "{agent_prompt_path}"},
+            output_parser=parse_gemini_json,
+            session_command_template=[str(repl)],
+            session_delimiter=_SESSION_DELIMITER,
+        )
+        cls.prompt = cls.tmp / "agent.md"
+        cls.prompt.write_text("PERSONA", encoding="utf-8")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def setUp(self):
+        self.agent = UniversalCLIAgent.from_file(self.profile, "repl", self.prompt)
+
+    def tearDown(self):
+        self.agent.close()
+
+    def test_8_1_builtin_profiles_have_no_sessions(self):
+        """8.1 内置 profile 不支持会话模式，start() 返回 False"""
+        for profile in (GEMINI_PROFILE, CODEX_PROFILE):
+            with UniversalCLIAgent.from_file(profile, "plain", self.prompt) as agent:
+                self.assertFalse(agent.start())
+        print("  [OK] start() is a no-op for built-in profiles")
+
+    def test_8_2_session_reused(self):
+        """8.2 同一会话进程服务多次 call()/acall()，模型不同时走一次性进程"""
+        self.assertTrue(self.agent.start())
+        r1 = self.agent.call("one\ntwo")
+        r2 = self.agent.call("three")
+        r3 = asyncio.run(self.agent.acall("four"))
+        self.assertTrue(r1.content.startswith("turn1:one\ntwo:pid"), r1)
+        self.assertTrue(r2.content.startswith("turn2:three:"), r2)
+        self.assertTrue(r3.content.startswith("turn3:four:"), r3)
+        self.assertEqual(len({r.content.split("pid")[1] for r in (r1, r2, r3)}), 1)
+        r = self.agent.call("x", model="other")
+        self.assertTrue(r.content.startswith("once:x:"), r)
+        print("  [OK] Warm session served 3 calls")
+
+    def test_8_3_session_failure_replaced(self):
+        """8.3 超时或退出的会话被替换"""
+        self.assertTrue(self.agent.start())
+        r = self.agent.call("HANG", timeout=1)
+        self.assertEqual(r.error["type"], "timeout")
+        r = self.agent.call("after")
+        self.assertTrue(r.content.startswith("turn1:after:"), r)
+        r = self.agent.call("DIE")
+        self.assertEqual(r.error["type"], "cli_error")
+        r = self.agent.call("again")
+        self.assertTrue(r.content.startswith("turn1:again:"), r)
+        print("  [OK] Dead sessions replaced on next call")
+
+    def test_8_4_busy_sessions_overflow(self):
+        """8.4 会话全忙时，额外的并发调用使用一次性进程"""
+        from concurrent.futures import ThreadPoolExecutor
+        self.assertTrue(self.agent.start(sessions=2))
+        with ThreadPoolExecutor(3) as executor:
+            results = list(executor.map(self.agent.call, ["SLOW1", "SLOW2", "SLOW3"]))
+        turns = [r for r in results if r.content.startswith("turn")]
+        self.assertEqual(len({r.content.split("pid")[1] for r in turns}), 2, results)
+        self.assertEqual(sum(r.content.startswith("once:") for r in results), 1, results)
+        print("  [OK] 2 sessions + 1 one-shot process")
+
+    def test_8_5_pool(self):
+        """8.5 CLIAgentPool 并行执行，退出时清理临时目录"""
+        with CLIAgentPool(self.profile, "w", self.prompt, size=3) as pool:
+            results = [f.result() for f in [pool.submit("t%d" % i) for i in range(9)]]
+        self.assertTrue(all(r.ok for r in results), results)
+        self.assertLessEqual(len({r.content.split("pid")[1] for r in results}), 3)
+
+        codex = _fake_codex_profile(_write_fake_cli(self.tmp, "fake-codex", _FAKE_CODEX))
+        with CLIAgentPool(codex, "cw", self.prompt, size=2) as pool:
+            self.assertTrue(all(f.result().ok for f in [pool.submit("q%d" % i) for i in range(4)]))
+            dirs = [agent._persistent_temp_dir for agent in pool._agents]
+        self.assertTrue(any(dirs))
+        self.assertFalse(any(d and d.exists() for d in dirs), dirs)
+        print("  [OK] Pool results ok, temp dirs removed")
+
+    def test_8_6_invalid_utf8_output(self):
+        """8.6 输出含非法 UTF-8 字节时会话仍可继续使用"""
+        self.assertTrue(self.agent.start())
+        self.agent.call("BADBYTE", timeout=10)
+        r = self.agent.call("after", timeout=10)
+        self.assertTrue(r.content.startswith("turn2:after:"), r)
+        print("  [OK] Invalid byte replaced, session kept")
+
 
 # ╔══════════════════════════════════════════════════════════════════╗
 # ║  运行入口                                                        ║
@@ -476,6 +996,9 @@ if __name__ == "__main__":
     suite.addTests(loader.loadTestsFromTestCase(TestLayer1_Environment))
     suite.addTests(loader.loadTestsFromTestCase(TestLayer2_CLIFlags))
     suite.addTests(loader.loadTestsFromTestCase(TestLayer5_Profiles))
+    suite.addTests(loader.loadTestsFromTestCase(TestLayer6_Offline))
+    suite.addTests(loader.loadTestsFromTestCase(TestLayer7_FakeCLI))
+    suite.addTests(loader.loadTestsFromTestCase(TestLayer8_Sessions))
     suite.addTests(loader.loadTestsFromTestCase(TestLayer3_OutputFormat))
     suite.addTests(loader.loadTestsFromTestCase(TestLayer4_EndToEnd))
 